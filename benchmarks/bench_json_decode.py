@@ -0,0 +1,93 @@
+'''
+bench_json_decode.py
+
+Compares the JSON backends of pipeline/json_codec on blockNotification frames.
+
+    python -m benchmarks.bench_json_decode [frames_file] [--repeat N]
+
+frames_file: recorded frames, one raw websocket message per line.
+Without file, a synthetic block (Pump-like transactions with full meta) is used.
+'''
+
+import argparse
+import base64
+import json
+import os
+import time
+
+from pipeline import json_codec
+
+
+def synthetic_frame(num_transactions=2000, failed_ratio=0.1):
+    transactions = []
+    for i in range(num_transactions):
+        transactions.append({
+            "transaction": [base64.b64encode(os.urandom(600)).decode(), "base64"],
+            "meta": {
+                "err": {"InstructionError": [2, {"Custom": 6003}]} if i % int(1 / failed_ratio) == 0 else None,
+                "fee": 5000,
+                "computeUnitsConsumed": 61234,
+                "preBalances": [1_000_000_000 + j for j in range(16)],
+                "postBalances": [999_000_000 + j for j in range(16)],
+                "preTokenBalances": [{"accountIndex": 3, "mint": "x" * 44, "uiTokenAmount": {"amount": "1000", "decimals": 6}}],
+                "postTokenBalances": [{"accountIndex": 3, "mint": "x" * 44, "uiTokenAmount": {"amount": "2000", "decimals": 6}}],
+                "innerInstructions": [],
+                "logMessages": [f"Program log: Instruction: Buy {j}" for j in range(25)]
+                + ["Program data: " + base64.b64encode(os.urandom(120)).decode()],
+                "rewards": [],
+                "status": {"Ok": None},
+            },
+            "version": 0,
+        })
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "blockNotification",
+        "params": {
+            "result": {
+                "context": {"slot": 1},
+                "value": {"slot": 1, "block": {"blockTime": 0, "transactions": transactions}, "err": None},
+            },
+            "subscription": 0,
+        },
+    })
+
+
+def load_frames(path):
+    with open(path, 'r') as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def stdlib_full(message):
+    data = json.loads(message)
+    return json_codec._block_transactions_from_dict(data)
+
+
+def bench(name, fn, frames, repeat):
+    fn(frames[0])  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            fn(frame)
+    elapsed = time.perf_counter() - start
+    total_mb = sum(len(f) for f in frames) * repeat / 1e6
+    per_frame_ms = elapsed / (repeat * len(frames)) * 1000
+    print(f"{name:<22} {per_frame_ms:9.3f} ms/frame  {total_mb / elapsed:9.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames_file", nargs="?")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_file) if args.frames_file else [synthetic_frame()]
+    print(f"{len(frames)} frame(s), {sum(len(f) for f in frames) / len(frames) / 1e6:.2f} MB avg | active backend: {json_codec.BACKEND}")
+
+    bench("json (full)", stdlib_full, frames, args.repeat)
+    if json_codec.orjson is not None:
+        bench("orjson (full)", lambda m: json_codec._block_transactions_from_dict(json_codec.orjson.loads(m)), frames, args.repeat)
+    bench(f"codec ({json_codec.BACKEND})", json_codec.decode_block_transactions, frames, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
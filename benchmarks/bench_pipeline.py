@@ -0,0 +1,259 @@
+'''
+bench_pipeline.py
+
+End-to-end benchmark of ingest -> dispatch -> monitor on synthetic Pump
+traffic (benchmarks/synthetic.py), with the watcher_v2 / monirot_v2 stack of
+main_V2.py.
+
+    python -m benchmarks.bench_pipeline [--tokens N] [--rate TX_PER_SEC] [--duration SEC]
+
+Scenarios:
+  dispatch : pre-built frames decoded and dispatched as fast as possible,
+             the monitors draining their queues after each frame (max tx/s).
+  ws       : a local websocket stand-in (own thread) answers blockSubscribe and
+             streams one frame per slot at --rate; rpc_listener is unchanged.
+  memory   : traced memory per monitored token after --trades-per-token trades.
+
+Latency is measured from the websocket send (or the dispatch of the frame) to
+the dequeue of the trade by its monitor, whose state update is synchronous.
+'''
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_PORT = int(os.environ.get("BENCH_WS_PORT", 8765))
+os.environ["SOLANA_NODE_WSS_ENDPOINT"] = f"ws://127.0.0.1:{BENCH_PORT}"
+os.environ.setdefault("RPC_HTTP_ENDPOINT", "http://127.0.0.1:1")
+
+import websockets
+
+from benchmarks.synthetic import PumpTxFactory, block_frame, random_key
+from pipeline.dispatcher import ProjectDispatcher
+from pipeline.event_queue import BoundedEventQueue
+from pipeline.json_codec import decode_block_transactions
+from pipeline.replay import drain
+from pipeline.rpc_listener import rpc_listener
+from pipeline.strategy import compile_strategy
+from pipeline.tx_parser import first_signature
+from pipeline.A_projects_watcher.watcher_v2 import watch_new_projects
+from pipeline.B_projects_monitoring.monirot_v2 import monitor_project
+
+SLOT_SEC = 0.4  # une frame par slot
+# Règles qui ne se déclenchent jamais : on mesure le pipeline, pas la stratégie
+BENCH_STRATEGY = compile_strategy({"name": "bench", "live": {
+    "min_holders": 0, "holder_check_sec": 1e9, "price_min_increase": 0.0,
+    "price_check_sec": 1e9, "no_holders_sec": 1e9, "momentum": None,
+}})
+
+
+class Probe:
+    """Send timestamps of the trades, latencies at monitor dequeue."""
+
+    def __init__(self):
+        self.sent = {}  # signature -> perf_counter
+        self.latencies = []
+        self.last_dequeue = None
+
+    def stamp(self, signatures):
+        now = time.perf_counter()
+        for signature in signatures:
+            self.sent[signature] = now
+
+    def queue_class(self):
+        probe = self
+
+        class ProbedQueue(BoundedEventQueue):
+            def _get(self):
+                item = super()._get()
+                sent = probe.sent.pop(getattr(item, "signature", None), None)
+                if sent is not None:
+                    probe.last_dequeue = time.perf_counter()
+                    probe.latencies.append(probe.last_dequeue - sent)
+                return item
+
+        return ProbedQueue
+
+
+def build_traffic(tokens, trades, trades_per_frame, seed=0):
+    """[(frame, trade signatures)]: the creates first, then random buys/sells."""
+    rng = random.Random(seed)
+    factory = PumpTxFactory()
+    mints = [random_key() for _ in range(tokens)]
+    users = [random_key() for _ in range(max(64, tokens * 4))]
+
+    frames = []
+    creates = [factory.create(mint, rng.choice(users), name=f"bench{i}", symbol=f"B{i}") for i, mint in enumerate(mints)]
+    for i in range(0, len(creates), trades_per_frame):
+        frames.append((block_frame(creates[i:i + trades_per_frame], slot=len(frames)), []))
+
+    for i in range(0, trades, trades_per_frame):
+        batch = [
+            factory.trade(rng.choice(mints), rng.choice(users), is_buy=rng.random() < 0.7,
+                          sol_amount=rng.randint(1, 50) * 1_000_000)
+            for _ in range(min(trades_per_frame, trades - i))
+        ]
+        signatures = [first_signature(tx) for tx, _ in batch]
+        frames.append((block_frame(batch, slot=len(frames)), signatures))
+    return frames, len(creates)
+
+
+def start_pipeline(dispatcher):
+    async def start_monitor(project):
+        asyncio.create_task(monitor_project(project, dispatcher, strategies=[BENCH_STRATEGY]))
+
+    dispatcher.register_callbacks.append(start_monitor)
+    return asyncio.create_task(watch_new_projects(dispatcher))
+
+
+async def measure_loop_lag(samples, interval=0.005):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+def percentiles_ms(values):
+    if not values:
+        return float("nan"), float("nan"), float("nan")
+    p50, p99 = np.percentile(values, [50, 99]) * 1000
+    return p50, p99, max(values) * 1000
+
+
+def report(name, probe, expected, elapsed, lag):
+    p50, p99, worst = percentiles_ms(probe.latencies)
+    lag50, lag99, lag_max = percentiles_ms(lag)
+    delivered = len(probe.latencies)
+    print(f"{name:<9} {delivered / elapsed:10.0f} tx/s  {delivered}/{expected} trades | "
+          f"latency p50 {p50:7.3f} ms  p99 {p99:7.3f} ms  max {worst:7.3f} ms | "
+          f"loop lag p99 {lag99:6.3f} ms  max {lag_max:6.3f} ms")
+
+
+async def run_dispatch(frames, creates):
+    probe = Probe()
+    dispatcher = ProjectDispatcher()
+    dispatcher.queue_class = probe.queue_class()
+    start_pipeline(dispatcher)
+    lag = []
+    lag_task = asyncio.create_task(measure_loop_lag(lag))
+
+    expected = sum(len(signatures) for _, signatures in frames)
+    start = time.perf_counter()
+    for frame, signatures in frames:
+        probe.stamp(signatures)
+        for tx in decode_block_transactions(frame):
+            await dispatcher.dispatch_transaction(tx.transaction, tx.log_messages, tx.inner_instructions)
+        await drain(dispatcher)
+    elapsed = time.perf_counter() - start
+    lag_task.cancel()
+    return probe, expected, elapsed, lag
+
+
+def serve_frames(frames, ready, done, probe):
+    """Websocket stand-in in its own thread and event loop: one frame per slot."""
+
+    async def handler(ws, *_):
+        await ws.recv()  # blockSubscribe
+        await ws.send(json.dumps({"jsonrpc": "2.0", "result": 0, "id": 1}))
+        start = time.perf_counter()
+        for i, (frame, signatures) in enumerate(frames):
+            delay = start + i * SLOT_SEC - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            probe.stamp(signatures)
+            await ws.send(frame)
+        done.set()
+        await asyncio.Future()
+
+    async def main():
+        async with websockets.serve(handler, "127.0.0.1", BENCH_PORT, max_size=None):
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+async def run_ws(frames, creates):
+    probe = Probe()
+    ready, done = threading.Event(), threading.Event()
+    threading.Thread(target=serve_frames, args=(frames, ready, done, probe), daemon=True).start()
+    ready.wait()
+
+    dispatcher = ProjectDispatcher()
+    dispatcher.queue_class = probe.queue_class()
+    start_pipeline(dispatcher)
+    lag = []
+    lag_task = asyncio.create_task(measure_loop_lag(lag))
+    listener = asyncio.create_task(rpc_listener(dispatcher))
+
+    expected = sum(len(signatures) for _, signatures in frames)
+    start = time.perf_counter()
+    while not done.is_set():
+        await asyncio.sleep(0.05)
+    deadline = time.perf_counter() + 5
+    while len(probe.latencies) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = (probe.last_dequeue or time.perf_counter()) - start
+    listener.cancel()
+    lag_task.cancel()
+    return probe, expected, elapsed, lag
+
+
+async def run_memory(tokens, trades_per_token):
+    frames, creates = build_traffic(tokens, tokens * trades_per_token, 200, seed=1)
+    dispatcher = ProjectDispatcher()
+    start_pipeline(dispatcher)
+    await asyncio.sleep(0)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for frame, _ in frames:
+        for tx in decode_block_transactions(frame):
+            await dispatcher.dispatch_transaction(tx.transaction, tx.log_messages, tx.inner_instructions)
+        await drain(dispatcher)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (current - baseline) / max(len(dispatcher.monitored_projects), 1), len(dispatcher.monitored_projects)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--rate", type=int, default=2000, help="trades per second (ws scenario)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--trades-per-token", type=int, default=50)
+    parser.add_argument("--scenarios", default="dispatch,ws,memory")
+    args = parser.parse_args()
+    scenarios = args.scenarios.split(",")
+
+    trades_per_frame = max(1, int(args.rate * SLOT_SEC))
+    frames, creates = build_traffic(args.tokens, int(args.rate * args.duration), trades_per_frame)
+    print(f"{args.tokens} tokens, {sum(len(s) for _, s in frames)} trades in {len(frames)} frames "
+          f"({trades_per_frame} trades/frame)")
+
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):  # logs du pipeline
+        if "dispatch" in scenarios:
+            results.append(("dispatch",) + await run_dispatch(frames, creates))
+        if "ws" in scenarios:
+            results.append(("ws",) + await run_ws(frames, creates))
+        memory = await run_memory(args.tokens, args.trades_per_token) if "memory" in scenarios else None
+
+    for name, probe, expected, elapsed, lag in results:
+        report(name, probe, expected, elapsed, lag)
+    if memory is not None:
+        per_token, monitored = memory
+        print(f"memory    {per_token / 1024:10.1f} KiB/token ({monitored} tokens, {args.trades_per_token} trades each)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
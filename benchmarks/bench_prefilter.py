@@ -0,0 +1,119 @@
+'''
+bench_prefilter.py
+
+Selectivity and cost of the instruction prefilter of block_decoder, against
+the former byte scan `any(d in raw for d in (CREATE, BUY, SELL))`.
+
+    python -m benchmarks.bench_prefilter [--transactions N] [--pump-ratio R] [--repeat N]
+
+Traffic: Pump buys/sells (benchmarks/synthetic.py) mixed with non-Pump
+transactions, among which routers that CPI into Pump (Pump program in the
+keys, discriminator in the router's own data) and random payloads carrying a
+discriminator. A false positive passes the filter without giving any
+instruction record.
+'''
+
+import argparse
+import os
+import random
+import time
+
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import Message
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from benchmarks.synthetic import PumpTxFactory, random_key
+from config import PUMP_PROGRAM
+from pipeline.block_decoder import (
+    BUY_DISCRIMINATOR,
+    CREATE_DISCRIMINATOR,
+    PUMP_KINDS,
+    SELL_DISCRIMINATOR,
+    decode_instructions,
+    get_account_indexes,
+)
+from pipeline.tx_parser import instruction_kinds, parse_pump_transaction
+
+DISCRIMINATORS = (CREATE_DISCRIMINATOR, BUY_DISCRIMINATOR, SELL_DISCRIMINATOR)
+
+
+def other_transaction(rng, with_pump_key):
+    """Non-Pump instruction; its data carries a Pump discriminator half of the time."""
+    program = random_key()
+    keys = [random_key() for _ in range(rng.randint(3, 12))]
+    if with_pump_key:
+        keys.append(PUMP_PROGRAM)  # compte passé au router (CPI)
+    keys.append(program)
+    data = os.urandom(rng.randint(8, 120))
+    if rng.random() < 0.5:
+        cut = rng.randint(0, len(data))
+        data = data[:cut] + rng.choice(DISCRIMINATORS) + data[cut:]
+    ix = CompiledInstruction(len(keys) - 1, data, bytes(range(len(keys) - 1)))
+    message = Message.new_with_compiled_instructions(1, 0, 1, keys, Hash.default(), [ix])
+    return bytes(VersionedTransaction.populate(message, [Signature.from_bytes(os.urandom(64))]))
+
+
+def build_traffic(count, pump_ratio, seed=0):
+    rng = random.Random(seed)
+    factory = PumpTxFactory()
+    mints = [random_key() for _ in range(50)]
+    transactions = []
+    for _ in range(count):
+        if rng.random() < pump_ratio:
+            tx, _ = factory.trade(rng.choice(mints), random_key(), is_buy=rng.random() < 0.7)
+        else:
+            tx = other_transaction(rng, with_pump_key=rng.random() < 0.3)
+        transactions.append(tx)
+    return transactions
+
+
+def byte_scan(raw):
+    return any(d in raw for d in DISCRIMINATORS)
+
+
+def prefilter(raw):
+    return instruction_kinds(raw, PUMP_KINDS)
+
+
+def gives_records(raw, mint_indexes, user_indexes):
+    transaction = parse_pump_transaction(raw)
+    if transaction is None:
+        return False
+    records = []
+    decode_instructions(transaction, mint_indexes, user_indexes, records)
+    return bool(records)
+
+
+def bench(name, fn, transactions, repeat, useful):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for raw in transactions:
+            fn(raw)
+    elapsed = time.perf_counter() - start
+    passed = [raw for raw in transactions if fn(raw)]
+    false_positives = sum(1 for raw in passed if raw not in useful)
+    print(f"{name:<10} {elapsed / (repeat * len(transactions)) * 1e9:8.0f} ns/tx | "
+          f"passed {len(passed)}/{len(transactions)}  false positives {false_positives} "
+          f"({false_positives / max(len(passed), 1):.1%} of passed)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--pump-ratio", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    transactions = build_traffic(args.transactions, args.pump_ratio)
+    mint_indexes, user_indexes = get_account_indexes()
+    useful = {raw for raw in transactions if gives_records(raw, mint_indexes, user_indexes)}
+    print(f"{len(transactions)} transactions, {len(useful)} with Pump instruction records")
+
+    bench("byte scan", byte_scan, transactions, args.repeat, useful)
+    bench("prefilter", prefilter, transactions, args.repeat, useful)
+
+
+if __name__ == "__main__":
+    main()
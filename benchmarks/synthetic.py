@@ -0,0 +1,133 @@
+'''
+synthetic.py
+
+Synthetic Pump transactions for the benchmarks, built from the IDL: account
+order of create/buy/sell, argument layout, and TradeEvent logs with the
+virtual reserves after each trade.
+'''
+
+import base64
+import json
+import os
+import struct
+
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from config import PUMP_PROGRAM
+from pipeline.block_decoder import BUY_DISCRIMINATOR, CREATE_DISCRIMINATOR, SELL_DISCRIMINATOR
+from pipeline.event_decoder import PROGRAM_DATA_PREFIX, event_discriminator, load_event_layouts
+
+IDL_PATH = 'idl/pump_fun_idl.json'
+
+INITIAL_VIRTUAL_SOL = 30_000_000_000
+INITIAL_VIRTUAL_TOKENS = 1_073_000_000_000_000
+
+
+def random_key():
+    return Pubkey.from_bytes(os.urandom(32))
+
+
+def _load_instructions(idl_path=IDL_PATH):
+    with open(idl_path, 'r') as f:
+        idl = json.load(f)
+    return {ix['name']: ix for ix in idl['instructions']}
+
+
+class PumpTxFactory:
+    """Wire transactions of the Pump program, accounts placed as in the IDL."""
+
+    def __init__(self, idl_path=IDL_PATH):
+        instructions = _load_instructions(idl_path)
+        self.accounts = {name: [a['name'] for a in instructions[name]['accounts']] for name in ("create", "buy", "sell")}
+        self.trade_event = next(
+            layout for layout in load_event_layouts(idl_path).values() if layout.name == "TradeEvent"
+        )
+        self.reserves = {}  # mint -> [virtual sol, virtual tokens]
+
+    def _transaction(self, ix_name, data, named_keys, signers=1):
+        # Payeur (user) en premier, programme en dernier (lecture seule, non signataire)
+        account_keys = {
+            name: PUMP_PROGRAM if name == "program" else named_keys.get(name) or random_key()
+            for name in self.accounts[ix_name]
+        }
+        keys = [named_keys["user"]]
+        for key in account_keys.values():
+            if key not in keys and key != PUMP_PROGRAM:
+                keys.append(key)
+        keys.append(PUMP_PROGRAM)
+        index = {key: i for i, key in enumerate(keys)}
+
+        accounts = bytes(index[account_keys[name]] for name in self.accounts[ix_name])
+        ix = CompiledInstruction(index[PUMP_PROGRAM], data, accounts)
+        message = Message.new_with_compiled_instructions(signers, 0, 1, keys, Hash.default(), [ix])
+        signatures = [Signature.from_bytes(os.urandom(64)) for _ in range(signers)]
+        return bytes(VersionedTransaction.populate(message, signatures))
+
+    def create(self, mint, user, name="pepe", symbol="PEPE", uri="https://example.com/pepe.json"):
+        data = CREATE_DISCRIMINATOR
+        for value in (name, symbol, uri):
+            encoded = value.encode()
+            data += struct.pack("<I", len(encoded)) + encoded
+        self.reserves[mint] = [INITIAL_VIRTUAL_SOL, INITIAL_VIRTUAL_TOKENS]
+        return self._transaction("create", data, {"mint": mint, "user": user}, signers=2), []
+
+    def trade(self, mint, user, is_buy=True, sol_amount=10_000_000):
+        """(wire transaction, logMessages with the TradeEvent) of a buy or sell."""
+        reserves = self.reserves.setdefault(mint, [INITIAL_VIRTUAL_SOL, INITIAL_VIRTUAL_TOKENS])
+        vsol, vtok = reserves
+        if is_buy:
+            token_amount = vtok * sol_amount // (vsol + sol_amount)
+            reserves[0], reserves[1] = vsol + sol_amount, vtok - token_amount
+        else:
+            token_amount = vtok * sol_amount // max(vsol - sol_amount, 1)
+            reserves[0], reserves[1] = max(vsol - sol_amount, 1), vtok + token_amount
+
+        discriminator = BUY_DISCRIMINATOR if is_buy else SELL_DISCRIMINATOR
+        data = discriminator + struct.pack("<QQ", token_amount, sol_amount)
+        tx = self._transaction("buy" if is_buy else "sell", data, {"mint": mint, "user": user})
+
+        fields = {
+            "mint": bytes(mint), "solAmount": sol_amount, "tokenAmount": token_amount, "isBuy": is_buy,
+            "user": bytes(user), "timestamp": 0,
+            "virtualSolReserves": reserves[0], "virtualTokenReserves": reserves[1],
+        }
+        values = [fields.get(name, 0) for name in self.trade_event.tuple_type._fields]
+        event = event_discriminator("TradeEvent") + self.trade_event.struct.pack(*values)
+        logs = [
+            f"Program {PUMP_PROGRAM} invoke [1]",
+            f"Program log: Instruction: {'Buy' if is_buy else 'Sell'}",
+            PROGRAM_DATA_PREFIX + base64.b64encode(event).decode(),
+            f"Program {PUMP_PROGRAM} success",
+        ]
+        return tx, logs
+
+
+def block_frame(transactions, slot=1):
+    """blockNotification frame of (wire tx, logMessages) pairs."""
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "blockNotification",
+        "params": {
+            "result": {
+                "context": {"slot": slot},
+                "value": {
+                    "slot": slot,
+                    "block": {
+                        "blockTime": 0,
+                        "transactions": [
+                            {"transaction": [base64.b64encode(tx).decode(), "base64"],
+                             "meta": {"err": None, "logMessages": logs}}
+                            for tx, logs in transactions
+                        ],
+                    },
+                    "err": None,
+                },
+            },
+            "subscription": 0,
+        },
+    })
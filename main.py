@@ -23,24 +23,55 @@ SOLANA_NODE_WSS_ENDPOINT = os.environ["SOLANA_NODE_WSS_ENDPOINT"]
 RPC_HTTP_ENDPOINT = os.environ["RPC_HTTP_ENDPOINT"]
 
 from config import *
+from pipeline import backfill, snapshot
+from pipeline.dispatcher import ProjectDispatcher
+from pipeline.metrics import METRICS_PORT, start_metrics_server
+from pipeline.rpc_listener import rpc_listener
+from pipeline.strategy import compile_filters, load_strategies
 from pipeline.A_projects_watcher.watcher import watch_new_projects
 from pipeline.B_projects_monitoring.monitor import monitor_project
+from pipeline.B_projects_monitoring.bonding_curve_fetcher import bonding_curve_fetcher
 
 
 DEBUG = False
+STRATEGIES_FILE = "strategies.json"  # filtres de création + règles live (pipeline/strategy.py)
+SNAPSHOT_FILE = snapshot.SNAPSHOT_FILE  # None : pas de reprise à chaud (pipeline/snapshot.py)
 
 async def main():
     project_queue = asyncio.Queue()
     monitored_data_queue = asyncio.Queue()
 
+    # Un seul flux de blocs partagé par tous les monitors (les créations viennent du watcher)
+    dispatcher = ProjectDispatcher(watch_creations=False)
+    await start_metrics_server(port=METRICS_PORT)  # http://127.0.0.1:9108/metrics
+    # Rafraîchissement groupé des bonding curves (getMultipleAccounts)
+    asyncio.create_task(bonding_curve_fetcher(dispatcher, debug=DEBUG))
+    asyncio.create_task(dispatcher.alt_store.run(dispatcher.route_lookup, debug=DEBUG))  # trades via lookup tables
+
     # Exemple : activer un filtre par nom (optionnel)
     filters = {
         "name_contains": "pepe",
         # "creator_address": "AdresseDuCréateur"
     }
+    strategies = load_strategies(STRATEGIES_FILE) if os.path.exists(STRATEGIES_FILE) else compile_filters(None)
+
+    # Reprise à chaud : les monitors des tokens du snapshot repartent avec leur état,
+    # puis les blocs manqués depuis le snapshot sont rattrapés (getBlock) avant le flux live
+    if SNAPSHOT_FILE:
+        cursor = await snapshot.restore(dispatcher, SNAPSHOT_FILE)
+        for mint in list(dispatcher.monitored_projects):
+            project = dispatcher.project_definitions[mint]
+            asyncio.create_task(
+                monitor_project(project, dispatcher, out_queue=monitored_data_queue,
+                                strategies=strategies.for_project(project), debug=True)
+            )
+        await asyncio.sleep(0)  # Les monitors reprennent leur état avant le rattrapage
+        await backfill.catch_up(dispatcher, cursor, debug=DEBUG)
+        asyncio.create_task(snapshot.snapshot_loop(dispatcher, SNAPSHOT_FILE, debug=DEBUG))
+    asyncio.create_task(rpc_listener(dispatcher, debug=DEBUG))
 
     # Lancer le watcher des nouveaux projets
-    asyncio.create_task(watch_new_projects(project_queue, filters=None, debug=DEBUG))
+    asyncio.create_task(watch_new_projects(project_queue, filters=strategies, debug=DEBUG))
 
     # Boucle pour lancer un monitor sur chaque projet détecté
     count = 0  # <- compteur
@@ -60,8 +91,10 @@ async def main():
         await asyncio.sleep(0.1)
 
         # Lancer le monitor pour ce token
+        await dispatcher.register_project(project)
         asyncio.create_task(
-            monitor_project(project, out_queue=monitored_data_queue,debug=True)
+            monitor_project(project, dispatcher, out_queue=monitored_data_queue,
+                            strategies=strategies.for_project(project), debug=True)
         )
 
         # await asyncio.sleep(1)
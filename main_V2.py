@@ -19,30 +19,65 @@ RPC_HTTP_ENDPOINT = os.environ["RPC_HTTP_ENDPOINT"]
 from config import *
 
 from pipeline.dispatcher import ProjectDispatcher
+from pipeline.metrics import METRICS_PORT, start_metrics_server
 from pipeline.rpc_listener import rpc_listener
+from pipeline.decode_pool import BlockDecodePool
+from pipeline.replay import BlockRecorder
+from pipeline import backfill, snapshot
+from pipeline.strategy import compile_filters, load_strategies
 from pipeline.A_projects_watcher.watcher_v2 import watch_new_projects
-from pipeline.B_projects_monitoring.monirot_v2 import monitor_project  # Ton fichier canvas actuel
+from pipeline.B_projects_monitoring.monirot_v2 import DEFAULT_SPEC, monitor_project  # Ton fichier canvas actuel
 from pipeline.B_projects_monitoring.bonding_curve_fetcher import bonding_curve_fetcher
+from pipeline.B_projects_monitoring.curve_subscriber import CurveSubscriptionManager
 
 DEBUG = True  # Active les logs
+DECODE_WORKERS = 0  # > 0 : décodage des blocs dans un pool de processus
+CURVE_MODE = "poll"  # "push" : accountSubscribe sur chaque bonding curve au lieu du polling RPC
+STRATEGIES_FILE = "strategies.json"  # filtres de création + règles live (pipeline/strategy.py)
+RECORD_DIR = None  # ex: "data/blocks" : enregistre le flux brut pour le replay (python -m pipeline.replay)
+SNAPSHOT_FILE = snapshot.SNAPSHOT_FILE  # None : pas de reprise à chaud (pipeline/snapshot.py)
 
 
 
 async def main():
 
     dispatcher = ProjectDispatcher()
+    await start_metrics_server(port=METRICS_PORT)  # http://127.0.0.1:9108/metrics
     already_launched = set()  # Pour éviter de lancer deux fois le même projet
 
     filters = {
         "name_contains": "pepe",  # Exemple
         # "creator_address": "AdresseWallet"
     }
+    strategies = load_strategies(STRATEGIES_FILE) if os.path.exists(STRATEGIES_FILE) else compile_filters(DEFAULT_SPEC)
+
+    def launch_monitor(mint):
+        project = dispatcher.project_definitions[mint]
+        asyncio.create_task(monitor_project(project, dispatcher, strategies=strategies.for_project(project), debug=DEBUG))
+        already_launched.add(mint)
+        if DEBUG:
+            print(f"🚀 Monitoring started for {project['name']} ({mint})")
+
+    # Reprise à chaud : projets et état des monitors, puis rattrapage des blocs manqués (getBlock)
+    if SNAPSHOT_FILE:
+        cursor = await snapshot.restore(dispatcher, SNAPSHOT_FILE)
+        for mint in list(dispatcher.monitored_projects):
+            launch_monitor(mint)
+        await asyncio.sleep(0)  # Les monitors reprennent leur état avant le rattrapage
+        await backfill.catch_up(dispatcher, cursor, debug=DEBUG)
+        asyncio.create_task(snapshot.snapshot_loop(dispatcher, SNAPSHOT_FILE, debug=DEBUG))
 
     # Lancer les composants asynchrones
-    asyncio.create_task(rpc_listener(dispatcher, debug=DEBUG))
-    asyncio.create_task(watch_new_projects(dispatcher, filters=None, debug=DEBUG))
+    decode_pool = BlockDecodePool(DECODE_WORKERS) if DECODE_WORKERS > 0 else None
+    recorder = BlockRecorder(RECORD_DIR) if RECORD_DIR else None
+    asyncio.create_task(rpc_listener(dispatcher, debug=DEBUG, decode_pool=decode_pool, recorder=recorder))
+    asyncio.create_task(watch_new_projects(dispatcher, filters=strategies, debug=DEBUG))
+    asyncio.create_task(dispatcher.alt_store.run(dispatcher.route_lookup, debug=DEBUG))  # trades via lookup tables
+
+    first_project = CURVE_MODE == "poll"
+    if CURVE_MODE == "push":
+        asyncio.create_task(CurveSubscriptionManager(dispatcher, debug=DEBUG).run())
 
-    first_project = True
     # Boucle principale pour surveiller et lancer les monitors
     while True:
         await asyncio.sleep(0.2)
@@ -54,12 +89,7 @@ async def main():
                 first_project = False
 
             if mint not in already_launched:
-                project = dispatcher.project_definitions[mint]
-                asyncio.create_task(monitor_project(project, dispatcher, debug=DEBUG))
-                # Lancer la tâche de récupération des bonding curves
-                already_launched.add(mint)
-                if DEBUG:
-                    print(f"🚀 Monitoring started for {project['name']} ({mint})")
+                launch_monitor(mint)
 
 
 if __name__ == "__main__":
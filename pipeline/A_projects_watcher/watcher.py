@@ -8,8 +8,10 @@ import time
 from solders.transaction import VersionedTransaction
 from solders.pubkey import Pubkey
 from config import PUMP_PROGRAM
+from pipeline.json_codec import decode_block_transactions
+from pipeline.strategy import compile_filters
 import os
-from collections import deque
+from pipeline.dedup import RecentSet
 SOLANA_NODE_WSS_ENDPOINT = os.environ["SOLANA_NODE_WSS_ENDPOINT"]
 
 # Assure-toi que ces variables sont chargées
@@ -51,10 +53,10 @@ def decode_create_instruction(ix_data, ix_def, accounts):
 
 # %%
 async def watch_new_projects(queue: asyncio.Queue, filters=None, debug=False):
-    filters = filters or {}
+    strategies = compile_filters(filters)  # filtres compilés une fois
     idl = load_idl()
     create_ix_def = next(ix for ix in idl['instructions'] if ix['name'] == 'create')
-    recent_mints = deque(maxlen=1000)
+    recent_mints = RecentSet(1000)
 
     subscription_message = json.dumps({
         "jsonrpc": "2.0",
@@ -87,14 +89,13 @@ async def watch_new_projects(queue: asyncio.Queue, filters=None, debug=False):
 
                     try:
                         message = await asyncio.wait_for(websocket.recv(), timeout=30)
-                        data = json.loads(message)
-                        if data.get("method") != "blockNotification":
+                        transactions = decode_block_transactions(message)
+                        if not transactions:
                             continue
 
-                        transactions = data["params"]["result"]["value"]["block"].get("transactions", [])
                         for tx in transactions:
                             try:
-                                tx_b64 = tx["transaction"][0]
+                                tx_b64 = tx.transaction
                                 tx_raw = base64.b64decode(tx_b64)
 
                                 # ✅ Pré-filtrage sur les bytes directement
@@ -115,24 +116,12 @@ async def watch_new_projects(queue: asyncio.Queue, filters=None, debug=False):
                                     token_data = decode_create_instruction(ix.data, create_ix_def, accounts)
 
                                     mint = token_data["mint"]
-                                    if mint in recent_mints:
+                                    if not recent_mints.add(mint):
                                         continue
-                                    recent_mints.append(mint)
 
-                                    if len(recent_mints) > 1000:
-                                        recent_mints = set(list(recent_mints)[-500:])
-
-                                    name_match = True
-                                    user_match = True
-
-                                    if "name_contains" in filters:
-                                        name = token_data.get("name", "") + token_data.get("symbol", "")
-                                        name_match = filters["name_contains"].lower() in name.lower()
-
-                                    if "creator_address" in filters:
-                                        user_match = token_data.get("user", "") == filters["creator_address"]
-
-                                    if name_match and user_match:
+                                    matched = strategies.match(token_data)
+                                    if matched:
+                                        token_data["strategies"] = [s.name for s in matched]
                                         if debug:
                                             print(f"\n🎯 New project passed filters:")
                                             print(json.dumps(token_data, indent=2))
@@ -3,9 +3,9 @@ import asyncio
 import json
 import base64
 import struct
-from collections import deque
-from config import PUMP_PROGRAM
-from solders.transaction import VersionedTransaction
+from pipeline.dedup import RecentSet
+from solders.pubkey import Pubkey
+from pipeline.strategy import compile_filters
 
 CREATE_DISCRIMINATOR = struct.pack("<Q", 8576854823835016728)
 
@@ -50,37 +50,24 @@ def decode_create_instruction(ix_data, ix_def, accounts):
 
 
 async def watch_new_projects(dispatcher, filters=None, debug=False):
-    filters = filters or {}
+    strategies = compile_filters(filters)  # filtres compilés une fois
     idl = load_idl()
     create_ix_def = next(ix for ix in idl['instructions'] if ix['name'] == 'create')
-    recent_mints = deque(maxlen=1000)
+    recent_mints = RecentSet(1000)
 
     while True:
-        transaction, instruction, discriminator = await dispatcher.watcher_queue.get()
+        record = await dispatcher.watcher_queue.get()
 
-        account_keys = transaction.message.account_keys
-        program_id = str(account_keys[instruction.program_id_index])
-        if program_id != str(PUMP_PROGRAM):
-            continue
-
-        accounts = [str(account_keys[i]) for i in instruction.accounts if i < len(account_keys)]
-        token_data = decode_create_instruction(instruction.data, create_ix_def, accounts)
+        # Le dispatcher ne transmet que des instructions create du programme Pump
+        accounts = [str(Pubkey.from_bytes(key)) for key in record.accounts]
+        token_data = decode_create_instruction(record.data, create_ix_def, accounts)
 
         mint = token_data["mint"]
-        if mint in recent_mints:
+        if not recent_mints.add(mint):
             continue
-        recent_mints.append(mint)
-
-        name_match = True
-        user_match = True
-
-        if "name_contains" in filters:
-            name = token_data.get("name", "") + token_data.get("symbol", "")
-            name_match = filters["name_contains"].lower() in name.lower()
-
-        if "creator_address" in filters:
-            user_match = token_data.get("user", "") == filters["creator_address"]
 
-        if name_match and user_match:
-            log(f"🎯 New project registered: {token_data['name']} ({mint})", debug)
+        matched = strategies.match(token_data)
+        if matched:
+            token_data["strategies"] = [s.name for s in matched]  # règles live de chacune (rule_scheduler)
+            log(f"🎯 New project registered: {token_data['name']} ({mint}) [{', '.join(token_data['strategies'])}]", debug)
             await dispatcher.register_project(token_data)
@@ -2,39 +2,30 @@ import asyncio
 import base64
 import aiohttp
 import time
-from config import  LAMPORTS_PER_SOL
-from construct import Struct, Int64ul, Flag
+from pipeline.metrics import track_rpc
+from pipeline.B_projects_monitoring.curve_state import calculate_prices, decode_bonding_curves
 import os
 
 RPC_HTTP_ENDPOINT = os.environ["RPC_HTTP_ENDPOINT"]
 
-TOKEN_DECIMALS = 6
+BATCH_SIZE = 100  # max de comptes par getMultipleAccounts
+MAX_IN_FLIGHT = 4  # requêtes RPC simultanées (taille du pool de connexions)
+REFRESH_INTERVAL = 1.0  # une mise à jour par seconde et par mint au plus
+ACTIVITY_WINDOW = 10  # on ne rafraîchit que les mints actifs récemment
 
-class BondingCurveState:
-    _STRUCT = Struct(
-        "virtual_token_reserves" / Int64ul,
-        "virtual_sol_reserves" / Int64ul,
-        "real_token_reserves" / Int64ul,
-        "real_sol_reserves" / Int64ul,
-        "token_total_supply" / Int64ul,
-        "complete" / Flag
-    )
+_rpc_session = None
 
-    def __init__(self, data: bytes):
-        parsed = self._STRUCT.parse(data[8:])
-        self.virtual_token_reserves = parsed.virtual_token_reserves
-        self.virtual_sol_reserves = parsed.virtual_sol_reserves
-        self.token_total_supply = parsed.token_total_supply
 
-
-def calculate_price(state: BondingCurveState) -> float:
-    if state.virtual_token_reserves <= 0 or state.virtual_sol_reserves <= 0:
-        raise ValueError("Invalid bonding curve state: zero reserves")
-    return (state.virtual_sol_reserves / LAMPORTS_PER_SOL) / (
-        state.virtual_token_reserves / 10**TOKEN_DECIMALS
-    )
+def get_rpc_session():
+    """Shared keep-alive session: one connection pool for every RPC call."""
+    global _rpc_session
+    if _rpc_session is None or _rpc_session.closed:
+        connector = aiohttp.TCPConnector(limit=MAX_IN_FLIGHT, keepalive_timeout=60)
+        _rpc_session = aiohttp.ClientSession(connector=connector)
+    return _rpc_session
 
 
+@track_rpc("getAccountInfo")
 async def get_account_data(session, pubkey: str) -> bytes:
     headers = {"Content-Type": "application/json"}
     payload = {
@@ -61,63 +52,107 @@ async def get_account_data(session, pubkey: str) -> bytes:
             raise ValueError(f"Failed to decode account info: {e}")
 
 
+@track_rpc("getMultipleAccounts")
+async def get_multiple_accounts(session, pubkeys) -> list:
+    """Account data (bytes, or None if missing) for up to BATCH_SIZE pubkeys, in order."""
+    headers = {"Content-Type": "application/json"}
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "getMultipleAccounts",
+        "params": [
+            [str(pubkey) for pubkey in pubkeys],
+            {
+                "encoding": "base64",
+                "commitment": "confirmed"
+            }
+        ]
+    }
+    async with session.post(RPC_HTTP_ENDPOINT, json=payload, headers=headers) as response:
+        result = await response.json()
+    if "error" in result:
+        raise ValueError(f"getMultipleAccounts failed: {result['error']}")
+    values = result.get("result", {}).get("value")
+    if values is None:
+        raise ValueError("Malformed getMultipleAccounts response.")
+    return [
+        base64.b64decode(value["data"][0]) if value and value.get("data") else None
+        for value in values
+    ]
+
+
 async def bonding_curve_fetcher(dispatcher, debug=False):
-    async with aiohttp.ClientSession() as session:
-        last_fetch_time = {}
-        last_sent_price = {}
-
-        while True:
-            projects = list(dispatcher.project_definitions.items())
-            num_projects = len(projects)
-            
-            # Éviter une division par zéro ou une vitesse trop rapide
-            delay_per_call = max(0.1, 1.0 / max(num_projects, 10))
-
-            # Clean last_sent_price for removed projects
-            monitored = set(dispatcher.project_definitions.keys())
-            obsolete = set(last_sent_price.keys()) - monitored
-            for mint in obsolete:
-                del last_sent_price[mint]
-
-            for mint, project in projects:
-                bonding_curve_address = project.get("bondingCurve")
+    session = get_rpc_session()
+    last_fetch_time = {}
+    last_sent_price = {}
+
+    while True:
+        cycle_start = time.time()
+        projects = list(dispatcher.project_definitions.items())
+
+        # Clean caches for removed projects
+        monitored = set(dispatcher.project_definitions.keys())
+        for mint in set(last_sent_price.keys()) - monitored:
+            del last_sent_price[mint]
+        for mint in set(last_fetch_time.keys()) - monitored:
+            del last_fetch_time[mint]
+
+        # Toutes les bonding curves à rafraîchir pendant ce cycle
+        due = []
+        for mint, project in projects:
+            bonding_curve_address = project.get("bondingCurve")
+            if not bonding_curve_address or mint not in dispatcher.monitor_queues:
+                continue
+            if cycle_start - dispatcher.last_activity.get(mint, 0) > ACTIVITY_WINDOW:
+                continue
+            if cycle_start - last_fetch_time.get(mint, 0) < REFRESH_INTERVAL:
+                continue
+            if mint in dispatcher.completed_curves:
+                continue  # Migré : plus rien à suivre sur la courbe
+            if cycle_start - dispatcher.last_price_event.get(mint, 0) < ACTIVITY_WINDOW:
+                continue  # Prix déjà suivi via les TradeEvent du flux de blocs
+            due.append((mint, bonding_curve_address))
+
+        batches = [due[i:i + BATCH_SIZE] for i in range(0, len(due), BATCH_SIZE)]
+        results = await asyncio.gather(
+            *(get_multiple_accounts(session, [address for _, address in batch]) for batch in batches),
+            return_exceptions=True
+        )
+
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                if debug:
+                    print(f"[⚠️] Error fetching {len(batch)} bonding curves: {result}")
+                continue
+
+            # Décodage vectorisé de tout le lot
+            states, valid = decode_bonding_curves(result)
+            prices = calculate_prices(states, valid)
+
+            for i, (mint, _) in enumerate(batch):
+                last_fetch_time[mint] = cycle_start
                 queue = dispatcher.monitor_queues.get(mint)
-
-                if not bonding_curve_address or not queue:
+                if not valid[i] or queue is None:
                     continue
-
-                now = time.time()
-                last_active = dispatcher.last_activity.get(mint, 0)
-                if now - last_active > 10:
-                    await asyncio.sleep(delay_per_call)
+                if states["complete"][i]:
+                    await dispatcher.update_curve(
+                        mint, int(states["virtual_sol_reserves"][i]), int(states["virtual_token_reserves"][i]), True
+                    )
                     continue
 
-                last_time = last_fetch_time.get(mint, 0)
-                if now - last_time < 1.0:
-                    await asyncio.sleep(delay_per_call)
-                    continue  # On interroge max 1 fois par seconde
+                price = float(prices[i])
+                if price != price:
+                    continue  # NaN : réserves nulles
 
-                try:
-                    last_fetch_time[mint] = time.time()  # Met à jour immédiatement
-                    raw = await get_account_data(session, bonding_curve_address)
-                    curve = BondingCurveState(raw)
-                    price = calculate_price(curve)
-
-                    # Ne pas envoyer de mise à jour si le prix est inchangé
-                    last_price = last_sent_price.get(mint)
-                    if last_price is not None and abs(price - last_price) < 1e-10:
-                        continue  # ❌ Pas de changement significatif
-
-                    last_sent_price[mint] = price  # ✅ Met à jour le cache
-
-                    await queue.put(("price_update", price))
-                    if debug:
-                        print(f"[📊] Price updated for {project['name']} ({mint}): {price:.9f} SOL")
-
-                except Exception as e:
-                    if debug:
-                        print(f"[⚠️] Error fetching bonding curve for {mint}: {e}")
+                # Ne pas envoyer de mise à jour si le prix est inchangé
+                last_price = last_sent_price.get(mint)
+                if last_price is not None and abs(price - last_price) < 1e-10:
+                    continue
 
-                await asyncio.sleep(delay_per_call)
+                last_sent_price[mint] = price
+                await queue.put(("price_update", price))
+                if debug:
+                    print(f"[📊] Price updated for {dispatcher.project_definitions.get(mint, {}).get('name')} ({mint}): {price:.9f} SOL")
 
-            await asyncio.sleep(0.1)  # petite pause entre les cycles
+        # Un cycle par REFRESH_INTERVAL, quel que soit le nombre de mints
+        await asyncio.sleep(max(0.1, REFRESH_INTERVAL - (time.time() - cycle_start)))
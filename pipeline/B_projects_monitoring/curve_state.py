@@ -0,0 +1,76 @@
+# curve_state.py
+#
+# Bonding curve account layout (IDL "BondingCurve"), decoded with a
+# precompiled struct. decode_bonding_curves decodes a whole
+# getMultipleAccounts batch into NumPy columns.
+import struct
+from typing import NamedTuple
+import numpy as np
+from config import LAMPORTS_PER_SOL
+
+TOKEN_DECIMALS = 6
+CURVE_DISCRIMINATOR = struct.pack("<Q", 6966180631402821399)
+
+_LAYOUT = struct.Struct("<QQQQQ?")
+_HEADER = len(CURVE_DISCRIMINATOR)
+CURVE_DTYPE = np.dtype([
+    ("virtual_token_reserves", "<u8"),
+    ("virtual_sol_reserves", "<u8"),
+    ("real_token_reserves", "<u8"),
+    ("real_sol_reserves", "<u8"),
+    ("token_total_supply", "<u8"),
+    ("complete", "?"),
+])
+_EMPTY = bytes(_LAYOUT.size)
+
+
+class BondingCurveState(NamedTuple):
+    virtual_token_reserves: int
+    virtual_sol_reserves: int
+    real_token_reserves: int
+    real_sol_reserves: int
+    token_total_supply: int
+    complete: bool  # True once the curve has migrated
+
+
+def decode_bonding_curve(data: bytes) -> BondingCurveState:
+    if data[:_HEADER] != CURVE_DISCRIMINATOR:
+        raise ValueError("❌ Invalid curve state discriminator")
+    return BondingCurveState._make(_LAYOUT.unpack_from(data, _HEADER))
+
+
+def decode_bonding_curves(buffers):
+    """
+    Batch decode of account buffers (None for missing accounts).
+    Returns (states, valid): a structured array with CURVE_DTYPE and a bool mask.
+    """
+    valid = np.fromiter(
+        (buf is not None and buf[:_HEADER] == CURVE_DISCRIMINATOR and len(buf) >= _HEADER + _LAYOUT.size
+         for buf in buffers),
+        dtype=bool, count=len(buffers)
+    )
+    joined = b"".join(
+        buf[_HEADER:_HEADER + _LAYOUT.size] if ok else _EMPTY
+        for buf, ok in zip(buffers, valid)
+    )
+    return np.frombuffer(joined, dtype=CURVE_DTYPE), valid
+
+
+def price_from_reserves(virtual_sol_reserves, virtual_token_reserves) -> float:
+    if virtual_token_reserves <= 0 or virtual_sol_reserves <= 0:
+        raise ValueError("❌ Invalid bonding curve state: zero reserves")
+    return (virtual_sol_reserves / LAMPORTS_PER_SOL) / (
+        virtual_token_reserves / 10**TOKEN_DECIMALS
+    )
+
+
+def calculate_price(state: BondingCurveState) -> float:
+    return price_from_reserves(state.virtual_sol_reserves, state.virtual_token_reserves)
+
+
+def calculate_prices(states, valid):
+    """Vectorized calculate_price, NaN where the state is missing or has zero reserves."""
+    sol = states["virtual_sol_reserves"] / LAMPORTS_PER_SOL
+    tokens = states["virtual_token_reserves"] / 10**TOKEN_DECIMALS
+    ok = valid & (sol > 0) & (tokens > 0)
+    return np.divide(sol, tokens, out=np.full(len(states), np.nan), where=ok)
@@ -0,0 +1,151 @@
+# curve_subscriber.py
+#
+# Push mode for bonding-curve state (alternative to bonding_curve_fetcher):
+# one multiplexed websocket, one accountSubscribe per monitored bondingCurve.
+# Subscriptions follow ProjectDispatcher.register_project / unregister_project
+# without reconnecting, and are all re-sent after a reconnect. A send that
+# fails in a dispatcher callback (connection closed) is not raised into
+# register_project: the mint stays in `curves` for the resubscribe.
+import asyncio
+import base64
+import json
+import os
+import websockets
+from pipeline.json_codec import loads
+from pipeline.B_projects_monitoring.curve_state import decode_bonding_curve
+
+SOLANA_NODE_WSS_ENDPOINT = os.environ["SOLANA_NODE_WSS_ENDPOINT"]
+
+
+class CurveSubscriptionManager:
+    def __init__(self, dispatcher, debug=False):
+        self.dispatcher = dispatcher
+        self.debug = debug
+        self.curves = {}  # mint -> bonding curve address (wanted subscriptions)
+        self.subscriptions = {}  # subscription id -> mint
+        self.subscription_by_mint = {}  # mint -> subscription id
+        self.pending = {}  # request id -> mint (None for unsubscribe requests)
+        self.ws = None
+        self._next_id = 0
+
+        dispatcher.register_callbacks.append(self.on_register)
+        dispatcher.unregister_callbacks.append(self.on_unregister)
+        for mint, project in dispatcher.project_definitions.items():
+            if project.get("bondingCurve"):
+                self.curves[mint] = project["bondingCurve"]
+
+    def _request_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    async def _send_subscribe(self, mint, bonding_curve):
+        request_id = self._request_id()
+        self.pending[request_id] = mint
+        await self.ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "accountSubscribe",
+            "params": [bonding_curve, {"encoding": "base64", "commitment": "confirmed"}]
+        }))
+
+    async def _send_unsubscribe(self, subscription_id):
+        request_id = self._request_id()
+        self.pending[request_id] = None
+        await self.ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "accountUnsubscribe",
+            "params": [subscription_id]
+        }))
+
+    async def on_register(self, project):
+        mint = project["mint"]
+        bonding_curve = project.get("bondingCurve")
+        if not bonding_curve or mint in self.curves:
+            return
+        self.curves[mint] = bonding_curve
+        if self.ws is not None:
+            try:
+                await self._send_subscribe(mint, bonding_curve)
+            except Exception as e:
+                self._send_failed("subscribe", mint, e)  # Renvoyé par _resubscribe_all
+
+    async def on_unregister(self, mint):
+        if self.curves.pop(mint, None) is None:
+            return
+        subscription_id = self.subscription_by_mint.pop(mint, None)
+        if subscription_id is None:
+            return  # Pas encore confirmé : désabonné à la confirmation
+        self.subscriptions.pop(subscription_id, None)
+        if self.ws is not None:
+            try:
+                await self._send_unsubscribe(subscription_id)
+            except Exception as e:
+                self._send_failed("unsubscribe", mint, e)  # L'abonnement meurt avec la connexion
+
+    def _send_failed(self, action, mint, error):
+        if self.debug:
+            print(f"[⚠️] Curve {action} not sent for {mint} ({error}), pending reconnect")
+
+    async def _resubscribe_all(self):
+        self.subscriptions.clear()
+        self.subscription_by_mint.clear()
+        self.pending.clear()
+        # Envoi groupé sans attendre les confirmations
+        for mint, bonding_curve in list(self.curves.items()):
+            await self._send_subscribe(mint, bonding_curve)
+        if self.debug:
+            print(f"📡 {len(self.curves)} bonding curve subscriptions sent.")
+
+    async def _handle_response(self, message):
+        mint = self.pending.pop(message["id"], None)
+        result = message.get("result")
+        if mint is None or not isinstance(result, int) or isinstance(result, bool):
+            if "error" in message and self.debug:
+                print(f"[⚠️] Subscription request failed: {message['error']}")
+            return
+
+        if mint not in self.curves:
+            # Projet retiré entre la demande et la confirmation
+            await self._send_unsubscribe(result)
+            return
+        self.subscriptions[result] = mint
+        self.subscription_by_mint[mint] = result
+
+    async def _handle_notification(self, params):
+        mint = self.subscriptions.get(params["subscription"])
+        if mint is None:
+            return
+        value = params["result"]["value"]
+        if not value or not value.get("data"):
+            return
+        try:
+            curve = decode_bonding_curve(base64.b64decode(value["data"][0]))
+        except Exception as e:
+            if self.debug:
+                print(f"[⚠️] Error decoding bonding curve push for {mint}: {e}")
+            return
+        await self.dispatcher.update_curve(
+            mint, curve.virtual_sol_reserves, curve.virtual_token_reserves, curve.complete
+        )
+
+    async def run(self):
+        while True:
+            try:
+                async with websockets.connect(SOLANA_NODE_WSS_ENDPOINT, ping_interval=20, ping_timeout=20) as ws:
+                    self.ws = ws
+                    await self._resubscribe_all()
+
+                    async for raw in ws:
+                        message = loads(raw)
+                        if message.get("method") == "accountNotification":
+                            await self._handle_notification(message["params"])
+                        elif "id" in message:
+                            await self._handle_response(message)
+
+            except Exception as e:
+                print(f"🔌 Curve subscription WebSocket error: {e}")
+                print("🔁 Reconnecting in 5 seconds...")
+            finally:
+                self.ws = None
+            await asyncio.sleep(5)
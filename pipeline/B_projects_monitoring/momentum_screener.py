@@ -0,0 +1,157 @@
+# momentum_screener.py
+#
+# Cross-token momentum screener: the per-second price, buyers and volume of
+# every monitored mint live in one (metric, token, second) array driven by a
+# single clock (column = second % capacity). One screen() call checks
+# freshness, monotonicity and thresholds for all tokens with a few NumPy
+# operations and returns the ranked matches. The first second is tracked per
+# (metric, token): a metric only has history from its own first sample on.
+import numpy as np
+from pipeline import clock
+
+METRICS = ("price", "buyers", "volume")
+PRICE, BUYERS, VOLUME = range(len(METRICS))
+
+
+class MomentumScreener:
+    def __init__(self, capacity_sec=64, max_tokens=256, min_points=5, max_age_sec=7, min_volume=0.0, min_buyers=0):
+        self.capacity = capacity_sec
+        self.min_points = min_points
+        self.max_age_sec = max_age_sec
+        self.min_volume = min_volume
+        self.min_buyers = min_buyers
+
+        self.values = np.zeros((len(METRICS), max_tokens, capacity_sec), dtype=np.float64)
+        self.first_sec = np.full((len(METRICS), max_tokens), -1, dtype=np.int64)  # -1 : pas encore de données
+        self.last_sec = np.full(max_tokens, -1, dtype=np.int64)
+        self.rows = {}  # mint -> row
+        self.row_mints = [None] * max_tokens
+        self.free_rows = list(range(max_tokens - 1, -1, -1))
+        self.head = None  # dernière seconde du buffer (horloge commune)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _grow(self):
+        size = self.values.shape[1]
+        self.values = np.concatenate([self.values, np.zeros_like(self.values)], axis=1)
+        self.first_sec = np.concatenate([self.first_sec, np.full_like(self.first_sec, -1)], axis=1)
+        self.last_sec = np.concatenate([self.last_sec, np.full(size, -1, dtype=np.int64)])
+        self.row_mints.extend([None] * size)
+        self.free_rows.extend(range(2 * size - 1, size - 1, -1))
+
+    def add_token(self, mint) -> int:
+        row = self.rows.get(mint)
+        if row is not None:
+            return row
+        if not self.free_rows:
+            self._grow()
+        row = self.free_rows.pop()
+        self.rows[mint] = row
+        self.row_mints[row] = mint
+        return row
+
+    def remove_token(self, mint):
+        row = self.rows.pop(mint, None)
+        if row is None:
+            return
+        self.values[:, row] = 0.0
+        self.first_sec[:, row] = -1
+        self.last_sec[row] = -1
+        self.row_mints[row] = None
+        self.free_rows.append(row)
+
+    def advance(self, sec):
+        """Move the common clock to `sec`: reset the skipped columns, carry the prices."""
+        if self.head is None:
+            self.head = sec
+            return
+        gap = sec - self.head
+        if gap <= 0:
+            return
+
+        values = self.values
+        previous = values[PRICE, :, self.head % self.capacity].copy()
+        if gap >= self.capacity:
+            values[:] = 0.0
+            values[PRICE] = previous[:, None]
+        else:
+            slots = np.arange(self.head + 1, sec + 1) % self.capacity
+            values[:, :, slots] = 0.0
+            values[PRICE][:, slots] = previous[:, None]
+        self.head = sec
+
+    def _slot(self, mint, m, timestamp):
+        row = self.rows.get(mint)
+        if row is None:
+            return None, None
+        sec = int(timestamp)
+        self.advance(sec)
+        if sec <= self.head - self.capacity:
+            return None, None  # Trop ancien
+        if self.first_sec[m, row] < 0 or sec < self.first_sec[m, row]:
+            self.first_sec[m, row] = sec
+        if sec > self.last_sec[row]:
+            self.last_sec[row] = sec
+        return row, sec % self.capacity
+
+    def add(self, mint, metric, timestamp, value):
+        m = METRICS.index(metric)
+        row, slot = self._slot(mint, m, timestamp)
+        if row is not None:
+            self.values[m, row, slot] += value
+
+    def set(self, mint, metric, timestamp, value):
+        m = METRICS.index(metric)
+        row, slot = self._slot(mint, m, timestamp)
+        if row is not None:
+            self.values[m, row, slot] = value
+
+    def seed(self, mint, series):
+        """Refill `mint` from its PerSecondSeries (warm restart, see snapshot.py)."""
+        if series.last_sec is None:
+            return
+        end = series.last_sec
+        for metric in METRICS:
+            # Chaque métrique repart de son propre premier échantillon
+            k = min(series.available(metric, end), self.capacity)
+            for sec, value in zip(range(end - k + 1, end + 1), series.last(metric, k)):
+                self.set(mint, metric, sec, value)
+
+    def screen(self, now=None, min_points=None, max_age_sec=None, min_volume=None, min_buyers=None):
+        """Ranked [(mint, price change over the window)] of the tokens whose
+        last `min_points` seconds are recent, recorded for each of price,
+        buyers and volume, and non-decreasing. Parameters default to the screener's own."""
+        now_sec = int(now or clock.now())
+        self.advance(now_sec)
+        k = min(min_points or self.min_points, self.capacity)
+        max_age_sec = self.max_age_sec if max_age_sec is None else max_age_sec
+        min_volume = self.min_volume if min_volume is None else min_volume
+        min_buyers = self.min_buyers if min_buyers is None else min_buyers
+
+        start = self.last_sec - (k - 1)
+        # Chaque métrique doit avoir ses propres min_points secondes d'historique
+        recorded = np.all((self.first_sec >= 0) & (start >= self.first_sec), axis=0)
+        fresh = recorded & (start >= now_sec - max_age_sec)
+        rows = np.flatnonzero(fresh)
+        if rows.size == 0:
+            return []
+
+        cols = (start[rows, None] + np.arange(k)) % self.capacity
+        window = self.values[:, rows[:, None], cols]  # (metric, token, k)
+
+        rising = np.all(window[:, :, 1:] >= window[:, :, :-1], axis=(0, 2))
+        match = (
+            rising
+            & (window[VOLUME].sum(axis=1) >= min_volume)
+            & (window[BUYERS].sum(axis=1) >= min_buyers)
+        )
+        if not match.any():
+            return []
+
+        first_price = window[PRICE, match, 0]
+        last_price = window[PRICE, match, -1]
+        score = np.divide(last_price, first_price, out=np.ones_like(last_price), where=first_price > 0) - 1
+        order = np.argsort(-score, kind="stable")
+        matched_rows = rows[match][order]
+        return [(self.row_mints[row], float(s)) for row, s in zip(matched_rows, score[order])]
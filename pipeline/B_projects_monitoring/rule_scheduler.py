@@ -0,0 +1,206 @@
+# rule_scheduler.py
+#
+# One scheduler for the exit rules of every monitored token, instead of one
+# evaluate_rules task per token waking every 0.5s. Each rule becomes active at
+# a deadline (heap entries carry the generation of their registration: those
+# of an unregistered or replaced registration are dropped when popped); once
+# active a rule only depends on the token state, so it is re-evaluated when
+# the monitor marks the token dirty (new trade or price). Momentum is also
+# only checked for dirty tokens, either per token or for all screened tokens
+# at once (MomentumScreener).
+# A token matched by several strategies has one registration per strategy on
+# the same state_map: a failed rule only drops its strategy, the monitor is
+# stopped (on_exit) when none is left, and on_match reports the strategy.
+import asyncio
+import heapq
+import itertools
+from pipeline import clock
+from pipeline.B_projects_monitoring.momentum_screener import MomentumScreener
+
+TICK_SEC = 0.5  # Un seul réveil pour tous les tokens
+
+NO_HOLDERS = "no_holders"
+MIN_HOLDERS = "min_holders"
+PRICE_RISE = "price_rise"
+
+NO_HOLDERS_SEC = 10
+RULES = (NO_HOLDERS, MIN_HOLDERS, PRICE_RISE)  # ordre d'évaluation
+
+
+def log(msg, debug=True):
+    if debug:
+        print(f"[DEBUG] {msg}")
+
+
+def strategy_rules(thresholds):
+    """Exit rules of a strategy: the price rule is off when price_min_increase is None."""
+    if thresholds.get("price_min_increase") is None:
+        return (NO_HOLDERS, MIN_HOLDERS)
+    return RULES
+
+
+def rule_delay(rule, thresholds):
+    if rule == NO_HOLDERS:
+        return thresholds.get("no_holders_sec", NO_HOLDERS_SEC)
+    if rule == MIN_HOLDERS:
+        return thresholds["holder_check_sec"]
+    return thresholds["price_check_sec"]
+
+
+def rule_failed(rule, state_map, thresholds):
+    if rule == NO_HOLDERS:
+        return state_map["holder_count"] == 0
+    if rule == MIN_HOLDERS:
+        return state_map["holder_count"] < thresholds["min_holders"]
+    if rule == PRICE_RISE:
+        history = state_map["price_history"]
+        if not history or state_map["price"] is None:
+            return False
+        return state_map["price"] < history[0][1] * (1 + thresholds["price_min_increase"])
+    return False
+
+
+def rule_message(rule, name, mint, thresholds):
+    if rule == NO_HOLDERS:
+        return f"💀 {name} ({mint}) - No holders after {thresholds.get('no_holders_sec', NO_HOLDERS_SEC)}s"
+    if rule == MIN_HOLDERS:
+        return f"⛔ {name} ({mint}) - Not enough holders after {thresholds['holder_check_sec']}s"
+    return f"📉 {name} ({mint}) - Price hasn't risen enough"
+
+
+class TokenRules:
+    __slots__ = ("mint", "name", "strategy", "generation", "state_map", "thresholds", "on_exit", "momentum", "screened",
+                 "on_match", "matched", "active", "debug")
+
+    def __init__(self, mint, name, strategy, generation, state_map, thresholds, on_exit, momentum, screened, on_match,
+                 debug):
+        self.mint = mint
+        self.name = name
+        self.strategy = strategy
+        self.generation = generation  # inscription à laquelle appartiennent les deadlines du heap
+        self.state_map = state_map
+        self.thresholds = thresholds
+        self.on_exit = on_exit
+        self.momentum = momentum
+        self.screened = screened
+        self.on_match = on_match
+        self.matched = False  # on_match déjà appelé pour cette stratégie
+        self.active = set()  # règles dont la deadline est passée
+        self.debug = debug
+
+
+class RuleScheduler:
+    def __init__(self, tick=TICK_SEC, screener=None):
+        self.tick = tick
+        self.screener = screener
+        self.manual = False  # True : run_once() appelé par l'appelant (replay), pas de tâche
+        self.tokens = {}  # mint -> {strategy: TokenRules}
+        self.deadlines = []  # heap of (deadline, seq, mint, strategy, generation, rule)
+        self.dirty = set()  # mints whose state changed since the last tick
+        self._seq = itertools.count()
+
+    def register(self, mint, name, state_map, thresholds, on_exit, rules=None, start_time=None,
+                 momentum=None, screened=False, on_match=None, strategy="default", debug=False):
+        """Register the rules of `strategy` for `mint` (rules default to strategy_rules(thresholds)).
+        on_exit() is called once, when the rules of every strategy of the token have failed;
+        momentum(state_map) -> bool, or a match of the shared screener if `screened`,
+        triggers on_match(state_map, strategy) once per strategy."""
+        if start_time is None:
+            start_time = clock.now()
+        generation = next(self._seq)
+        token = TokenRules(mint, name, strategy, generation, state_map, thresholds, on_exit, momentum, screened,
+                           on_match, debug)
+        self.tokens.setdefault(mint, {})[strategy] = token
+        for rule in strategy_rules(thresholds) if rules is None else rules:
+            deadline = start_time + rule_delay(rule, thresholds)
+            heapq.heappush(self.deadlines, (deadline, next(self._seq), mint, strategy, generation, rule))
+
+    def unregister(self, mint, strategy=None):
+        """Drop one strategy of `mint`, or all of them."""
+        # Les deadlines restantes sont ignorées au moment du pop (génération d'une ancienne inscription)
+        strategies = self.tokens.get(mint)
+        if strategies is not None and strategy is not None:
+            strategies.pop(strategy, None)
+            if strategies:
+                return
+        self.tokens.pop(mint, None)
+        self.dirty.discard(mint)
+
+    def mark_dirty(self, mint):
+        self.dirty.add(mint)
+
+    def run_once(self, now=None):
+        if now is None:
+            now = clock.now()
+        deadlines = self.deadlines
+        due = set()
+        while deadlines and deadlines[0][0] <= now:
+            _, _, mint, strategy, generation, rule = heapq.heappop(deadlines)
+            token = self.tokens.get(mint, {}).get(strategy)
+            if token is not None and token.generation == generation:
+                token.active.add(rule)
+                due.add(mint)
+
+        dirty, self.dirty = self.dirty, set()
+        screens = {}  # paramètres de momentum -> (kwargs de screen(), {mint: stratégies concernées})
+        for mint in due | dirty:
+            for token in list(self.tokens.get(mint, {}).values()):
+                if self._check_rules(token):
+                    continue
+                if mint not in dirty or token.matched:
+                    continue
+                if token.screened:
+                    params = token.thresholds.get("momentum") or {}
+                    entry = screens.setdefault(tuple(sorted(params.items())), (params, {}))
+                    entry[1].setdefault(mint, []).append(token)
+                elif token.momentum is not None and token.momentum(token.state_map):
+                    self._match(token)
+
+        if self.screener is None:
+            return
+        # Un passage vectorisé par jeu de paramètres (stratégie), dans l'ordre du classement
+        for params, candidates in screens.values():
+            for mint, _ in self.screener.screen(now, **params):
+                for token in candidates.get(mint, ()):
+                    if self.tokens.get(mint, {}).get(token.strategy) is token:
+                        self._match(token)
+
+    def _match(self, token):
+        token.matched = True
+        token.on_match(token.state_map, token.strategy)
+
+    def _check_rules(self, token):
+        """True if the strategy was dropped by one of its active rules (on_exit with the last one)."""
+        for rule in RULES:
+            if rule in token.active and rule_failed(rule, token.state_map, token.thresholds):
+                log(f"{rule_message(rule, token.name, token.mint, token.thresholds)} [{token.strategy}]", token.debug)
+                self.unregister(token.mint, token.strategy)
+                if token.mint not in self.tokens:
+                    token.on_exit()
+                return True
+        return False
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[⚠️] Rule evaluation failed: {e}")
+
+
+# Shared per process, started with the first monitor
+_scheduler = None
+_scheduler_task = None
+
+
+def get_rule_scheduler(manual=False):
+    """manual=True: no background task, ticks are driven by the caller (replay)."""
+    global _scheduler, _scheduler_task
+    if _scheduler is None:
+        _scheduler = RuleScheduler(screener=MomentumScreener())
+    if manual:
+        _scheduler.manual = True
+    elif not _scheduler.manual and (_scheduler_task is None or _scheduler_task.done()):
+        _scheduler_task = asyncio.create_task(_scheduler.run())
+    return _scheduler
@@ -0,0 +1,69 @@
+# running_stats.py
+#
+# O(1) running aggregates updated by the trade handlers of the monitors:
+# totals, buy VWAP, counts, holders and per-holder cost basis.
+# Windowed variants are queries on the TokenTradeLog (trade_log.py).
+
+
+class RunningTradeStats:
+    __slots__ = (
+        "buy_sol", "buy_tokens", "sell_sol", "sell_tokens",
+        "buy_count", "sell_count", "holder_count", "positions",
+    )
+
+    def __init__(self):
+        self.buy_sol = 0.0
+        self.buy_tokens = 0.0
+        self.sell_sol = 0.0
+        self.sell_tokens = 0.0
+        self.buy_count = 0
+        self.sell_count = 0
+        self.holder_count = 0
+        self.positions = {}  # actor -> [balance, cost basis in SOL]
+
+    def on_buy(self, actor, sol, tokens) -> bool:
+        """Returns True if `actor` becomes a holder."""
+        self.buy_sol += sol
+        self.buy_tokens += tokens
+        self.buy_count += 1
+
+        position = self.positions.get(actor)
+        if position is None:
+            position = self.positions[actor] = [0.0, 0.0]
+        new_holder = position[0] == 0
+        position[0] += tokens
+        position[1] += sol
+        if new_holder:
+            self.holder_count += 1
+        return new_holder
+
+    def on_sell(self, actor, sol, tokens) -> bool:
+        """Returns True if `actor` sold its whole balance."""
+        self.sell_sol += sol
+        self.sell_tokens += tokens
+        self.sell_count += 1
+
+        position = self.positions.get(actor)
+        if position is None:
+            position = self.positions[actor] = [0.0, 0.0]
+        prev = position[0]
+        new = max(prev - tokens, 0)
+        # Coût moyen : le coût restant suit la part conservée
+        position[1] = position[1] * (new / prev) if prev > 0 else 0.0
+        position[0] = new
+        if prev > 0 and new == 0:
+            self.holder_count = max(self.holder_count - 1, 0)
+            return True
+        return False
+
+    @property
+    def vwap(self):
+        """Average buy price (SOL per token), None before the first buy."""
+        return self.buy_sol / self.buy_tokens if self.buy_tokens > 0 else None
+
+    def cost_basis(self, actor):
+        """Average entry price of `actor`'s current balance, None if flat."""
+        position = self.positions.get(actor)
+        if not position or position[0] <= 0:
+            return None
+        return position[1] / position[0]
@@ -0,0 +1,103 @@
+# timeseries.py
+#
+# Fixed-capacity per-second time series: one circular row per metric,
+# indexed by `second % capacity`. Insert is O(1), skipped seconds are
+# filled (and old seconds expired) by overwriting their slots, and
+# "last k seconds" queries are a single fancy-indexing read.
+# History is tracked per metric: a second only counts for a metric from its
+# first sample on (price updates don't give buyers/volume any history).
+import numpy as np
+
+SUM = "sum"  # values of the same second are added (volume, counts)
+LAST = "last"  # last value of the second wins, carried over empty seconds (price)
+
+
+class PerSecondSeries:
+    __slots__ = ("capacity", "index", "carry_rows", "values", "first_sec", "last_sec")
+
+    def __init__(self, metrics, capacity=64):
+        """metrics: {name: SUM | LAST}"""
+        self.capacity = capacity
+        self.index = {name: i for i, name in enumerate(metrics)}
+        self.carry_rows = np.array([i for i, kind in enumerate(metrics.values()) if kind == LAST], dtype=np.intp)
+        self.values = np.zeros((len(metrics), capacity), dtype=np.float64)
+        self.first_sec = np.full(len(metrics), -1, dtype=np.int64)  # première seconde enregistrée, par métrique
+        self.last_sec = None
+
+    def advance(self, sec):
+        """Move the head to `sec`, resetting the slots of the skipped seconds."""
+        if self.last_sec is None:
+            self.last_sec = sec
+            return
+        gap = sec - self.last_sec
+        if gap <= 0:
+            return
+
+        capacity = self.capacity
+        previous = self.values[self.carry_rows, self.last_sec % capacity]
+        if gap >= capacity:
+            self.values[:] = 0.0
+            self.values[self.carry_rows] = previous[:, None]
+        else:
+            slots = np.arange(self.last_sec + 1, sec + 1) % capacity
+            self.values[:, slots] = 0.0
+            self.values[np.ix_(self.carry_rows, slots)] = previous[:, None]
+        self.last_sec = sec
+
+    def _slot(self, row, timestamp):
+        sec = int(timestamp)
+        self.advance(sec)
+        if sec <= self.last_sec - self.capacity:
+            return None  # Trop ancien, déjà expiré
+        if self.first_sec[row] < 0 or sec < self.first_sec[row]:
+            self.first_sec[row] = sec
+        return sec % self.capacity
+
+    def add(self, metric, timestamp, value):
+        row = self.index[metric]
+        slot = self._slot(row, timestamp)
+        if slot is not None:
+            self.values[row, slot] += value
+
+    def set(self, metric, timestamp, value):
+        row = self.index[metric]
+        slot = self._slot(row, timestamp)
+        if slot is not None:
+            self.values[row, slot] = value
+
+    def available(self, metric, now_sec):
+        """Number of seconds of `metric` history in the buffer, from its first sample up to `now_sec`."""
+        first = self.first_sec[self.index[metric]]
+        if first < 0:
+            return 0
+        return max(min(now_sec - first + 1, self.capacity), 0)
+
+    def last(self, metric, k, now_sec=None):
+        """Values of the last `k` seconds ending at `now_sec` (oldest first)."""
+        if now_sec is not None:
+            self.advance(now_sec)
+        end = self.last_sec
+        k = min(k, self.capacity)
+        slots = np.arange(end - k + 1, end + 1) % self.capacity
+        return self.values[self.index[metric], slots]
+
+    def last_many(self, metrics, k, now_sec=None):
+        """Same as last() for several metrics at once -> (len(metrics), k) array."""
+        if now_sec is not None:
+            self.advance(now_sec)
+        end = self.last_sec
+        k = min(k, self.capacity)
+        slots = np.arange(end - k + 1, end + 1) % self.capacity
+        rows = [self.index[m] for m in metrics]
+        return self.values[np.ix_(rows, slots)]
+
+
+# Métriques par seconde suivies par les monitors
+TRADE_METRICS = {
+    "price": LAST,
+    "tx_count": SUM,
+    "volume": SUM,
+    "buyers": SUM,
+    "sellers": SUM,
+    "volume_sell": SUM,
+}
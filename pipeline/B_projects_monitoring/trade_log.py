@@ -0,0 +1,106 @@
+# trade_log.py
+#
+# Columnar per-token trade store: preallocated NumPy columns
+# (ts, sol, tokens, side, actor_id) grown by doubling, O(1) amortized append
+# and vectorized window queries. Trades are appended in time order, so time
+# windows are located with a binary search on `ts`.
+# Rows older than `max_age` seconds are compacted away when the columns are
+# full, instead of growing them: the log keeps the last MAX_AGE_SEC seconds
+# (more than the longest rule window), their totals stay in vwap().
+import numpy as np
+
+BUY = 1
+SELL = -1
+MAX_AGE_SEC = 60
+COLUMNS = ("ts", "sol", "tokens", "side", "actor_id")
+
+
+class TokenTradeLog:
+    __slots__ = ("ts", "sol", "tokens", "side", "actor_id", "size", "actor_ids", "actors", "max_age", "compacted")
+
+    def __init__(self, capacity=64, max_age=MAX_AGE_SEC):
+        self.ts = np.empty(capacity, dtype=np.float64)
+        self.sol = np.empty(capacity, dtype=np.float64)
+        self.tokens = np.empty(capacity, dtype=np.float64)
+        self.side = np.empty(capacity, dtype=np.int8)
+        self.actor_id = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+        self.actor_ids = {}  # actor key -> small int id
+        self.actors = []  # id -> actor key
+        self.max_age = max_age  # None : aucune ligne retirée
+        self.compacted = {BUY: [0.0, 0.0], SELL: [0.0, 0.0]}  # side -> [sol, tokens] des lignes retirées
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = len(self.ts) * 2
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def intern(self, actor) -> int:
+        actor_id = self.actor_ids.get(actor)
+        if actor_id is None:
+            actor_id = len(self.actors)
+            self.actor_ids[actor] = actor_id
+            self.actors.append(actor)
+        return actor_id
+
+    def append(self, ts, sol, tokens, side, actor) -> int:
+        """Record a trade, returns the actor id."""
+        if self.size == len(self.ts):
+            if self.max_age is not None:
+                self.compact(ts - self.max_age)
+            if self.size > len(self.ts) // 2:
+                self._grow()  # Moins de la moitié libérée : on double quand même
+        i = self.size
+        actor_id = self.intern(actor)
+        self.ts[i] = ts
+        self.sol[i] = sol
+        self.tokens[i] = tokens
+        self.side[i] = side
+        self.actor_id[i] = actor_id
+        self.size = i + 1
+        return actor_id
+
+    def compact(self, before):
+        """Drop the trades with ts < before, keeping their totals for vwap()."""
+        end = self.window(None, before).stop
+        if not end:
+            return
+        for side, totals in self.compacted.items():
+            mask = self.side[:end] == side
+            totals[0] += float(self.sol[:end][mask].sum())
+            totals[1] += float(self.tokens[:end][mask].sum())
+        for name in COLUMNS:
+            column = getattr(self, name)
+            column[:self.size - end] = column[end:self.size]
+        self.size -= end
+
+    # --- Vectorized queries ---
+
+    def window(self, since=None, until=None) -> slice:
+        """Row slice of the trades with since <= ts < until."""
+        ts = self.ts[:self.size]
+        start = 0 if since is None else int(np.searchsorted(ts, since, side="left"))
+        end = self.size if until is None else int(np.searchsorted(ts, until, side="left"))
+        return slice(start, end)
+
+    def vwap(self, since=None, until=None, side=BUY):
+        """Volume-weighted average price (SOL per token), None without volume.
+        since=None also counts the compacted trades."""
+        rows = self.window(since, until)
+        if side is None:
+            sol, tokens = self.sol[rows].sum(), self.tokens[rows].sum()
+        else:
+            mask = self.side[rows] == side
+            sol, tokens = self.sol[rows][mask].sum(), self.tokens[rows][mask].sum()
+        if since is None:
+            for compacted_side, (compacted_sol, compacted_tokens) in self.compacted.items():
+                if side is None or side == compacted_side:
+                    sol += compacted_sol
+                    tokens += compacted_tokens
+        return float(sol / tokens) if tokens > 0 else None
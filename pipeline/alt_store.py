@@ -0,0 +1,123 @@
+# alt_store.py
+#
+# Address lookup tables (ALT) of v0 transactions, for the Pump trades whose
+# mint or trader is not among the static keys (aggregators, routers): the
+# decoder parks the whole transaction (LookupRecord) until both resolve.
+#   - LRU cache table key -> addresses, filled by batched getMultipleAccounts;
+#   - a table is fetched again only when a transaction indexes past its cached
+#     length (the table was extended since the fetch);
+#   - transactions whose tables are unknown are parked and retried once after
+#     the next batch, so there is no RPC call per transaction (bounded deque:
+#     the oldest one is dropped when full).
+import asyncio
+from collections import OrderedDict, deque
+from solders.pubkey import Pubkey
+from pipeline import metrics
+
+LOOKUP_TABLE_META_SIZE = 56  # header of the lookup table account, addresses after
+PUBKEY_LEN = 32
+ALT_CACHE_SIZE = 1024  # tables gardées en cache (~8 Kio max par table)
+MAX_PARKED = 10000  # transactions en attente de leurs tables
+FETCH_DELAY = 0.05  # fenêtre de regroupement des tables demandées
+
+ALT_HITS = metrics.counter("pump_alt_resolutions_total", "Transactions needing lookup tables", result="hit")
+ALT_PARKED = metrics.counter("pump_alt_resolutions_total", "Transactions needing lookup tables", result="parked")
+ALT_UNRESOLVED = metrics.counter("pump_alt_resolutions_total", "Transactions needing lookup tables", result="unresolved")
+ALT_FETCHED = metrics.counter("pump_alt_tables_fetched_total", "Lookup tables fetched from the RPC")
+
+
+def decode_lookup_table(data):
+    """Addresses (raw 32-byte keys) stored in a lookup table account."""
+    return tuple(
+        data[offset:offset + PUBKEY_LEN]
+        for offset in range(LOOKUP_TABLE_META_SIZE, len(data) - PUBKEY_LEN + 1, PUBKEY_LEN)
+    )
+
+
+class AltStore:
+    def __init__(self, capacity=ALT_CACHE_SIZE):
+        self.capacity = capacity
+        self.tables = OrderedDict()  # table key -> addresses, LRU order
+        self.missing = set()  # tables à (re)charger au prochain batch
+        self.parked = deque(maxlen=MAX_PARKED)  # (record, lookups)
+        self._wake = asyncio.Event()
+        metrics.gauge("pump_alt_cached_tables", "Lookup tables in the cache", lambda: len(self.tables))
+
+    def _stale(self, lookups):
+        """Tables of `lookups` unknown or shorter than the indexes used."""
+        stale = []
+        for table, writable, readonly in lookups:
+            addresses = self.tables.get(table)
+            if addresses is None or max(writable + readonly, default=0) >= len(addresses):
+                stale.append(table)
+        return stale
+
+    def resolve(self, lookups):
+        """Loaded keys (writable then readonly, as in the runtime), or None if a table is missing."""
+        if self._stale(lookups):
+            return None
+        writable, readonly = [], []
+        for table, writable_idx, readonly_idx in lookups:
+            addresses = self.tables[table]
+            self.tables.move_to_end(table)
+            writable.extend(addresses[i] for i in writable_idx)
+            readonly.extend(addresses[i] for i in readonly_idx)
+        ALT_HITS.inc()
+        return writable + readonly
+
+    def park(self, record, lookups):
+        """Keep `record` until its tables are fetched (see run())."""
+        if len(self.parked) == self.parked.maxlen:
+            ALT_UNRESOLVED.inc()  # Le plus ancien est évincé par append()
+        self.parked.append((record, lookups))
+        self.missing.update(self._stale(lookups))
+        ALT_PARKED.inc()
+        self._wake.set()
+
+    def store(self, table, data):
+        self.tables[table] = decode_lookup_table(data)
+        self.tables.move_to_end(table)
+        while len(self.tables) > self.capacity:
+            self.tables.popitem(last=False)
+
+    async def fetch_missing(self, session):
+        from pipeline.B_projects_monitoring.bonding_curve_fetcher import BATCH_SIZE, get_multiple_accounts
+
+        missing = list(self.missing)
+        self.missing.clear()
+        for i in range(0, len(missing), BATCH_SIZE):
+            batch = missing[i:i + BATCH_SIZE]
+            try:
+                accounts = await get_multiple_accounts(session, [Pubkey.from_bytes(table) for table in batch])
+            except Exception:
+                self.missing.update(batch)  # retentées au prochain passage
+                raise
+            for table, data in zip(batch, accounts):
+                if data is not None:
+                    self.store(table, data)
+                    ALT_FETCHED.inc()
+
+    async def run(self, on_resolved, debug=False):
+        """Fetch the missing tables in batches, then hand the parked records to on_resolved(record)."""
+        from pipeline.B_projects_monitoring.bonding_curve_fetcher import get_rpc_session
+
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await asyncio.sleep(FETCH_DELAY)
+            try:
+                await self.fetch_missing(get_rpc_session())
+            except Exception as e:
+                print(f"[⚠️] Lookup table fetch failed: {e}")
+                await asyncio.sleep(1)
+                self._wake.set()
+                continue
+
+            parked, self.parked = self.parked, deque(maxlen=MAX_PARKED)
+            for record, lookups in parked:
+                if self._stale(lookups):
+                    ALT_UNRESOLVED.inc()  # Table fermée, ou index hors table
+                    if debug:
+                        print(f"[⚠️] Unresolved lookup tables for {record.signature.hex()[:16]}")
+                    continue
+                await on_resolved(record)
@@ -0,0 +1,98 @@
+# backfill.py
+#
+# Catch-up after a warm restart (see snapshot.py): the blocks produced between
+# the snapshot cursor (slot of the last block dispatched) and the current slot
+# are fetched with getBlock and dispatched in slot order, at their block time
+# (VirtualClock), before going live. Fetches run FETCH_CONCURRENCY at a time.
+# A gap larger than MAX_BACKFILL_SLOTS is not backfilled (the rule windows are
+# expired anyway): the oldest slots are skipped. The blocks produced while the
+# websocket reconnects after the backfill are still missed.
+import asyncio
+import time
+from pipeline import clock
+from pipeline.json_codec import block_transactions
+from pipeline.metrics import track_rpc
+from pipeline.replay import drain
+from pipeline.B_projects_monitoring.bonding_curve_fetcher import RPC_HTTP_ENDPOINT, get_rpc_session
+
+MAX_BACKFILL_SLOTS = 2000  # ~15 minutes de blocs
+FETCH_CONCURRENCY = 8
+SKIPPED_SLOT_ERRORS = {-32004, -32007, -32009}  # bloc absent : slot sauté par le leader
+
+
+async def _rpc(session, method, params):
+    payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    async with session.post(RPC_HTTP_ENDPOINT, json=payload, headers={"Content-Type": "application/json"}) as response:
+        return await response.json()
+
+
+@track_rpc("getSlot")
+async def get_slot(session) -> int:
+    result = await _rpc(session, "getSlot", [{"commitment": "confirmed"}])
+    if "error" in result:
+        raise ValueError(f"getSlot failed: {result['error']}")
+    return result["result"]
+
+
+@track_rpc("getBlock")
+async def get_block(session, slot):
+    """(block time, successful BlockTransactions) of `slot`, or None for a skipped slot."""
+    result = await _rpc(session, "getBlock", [slot, {
+        "commitment": "confirmed",
+        "encoding": "base64",
+        "transactionDetails": "full",
+        "maxSupportedTransactionVersion": 0,
+        "rewards": False,
+    }])
+    if "error" in result:
+        if result["error"].get("code") in SKIPPED_SLOT_ERRORS:
+            return None
+        raise ValueError(f"getBlock {slot} failed: {result['error']}")
+    block = result.get("result")
+    if block is None:
+        return None
+    return block.get("blockTime"), block_transactions(block)
+
+
+async def catch_up(dispatcher, cursor, session=None, debug=False):
+    """Dispatch the blocks after `cursor` up to the current slot (monitors must be running)."""
+    if cursor is None:
+        return
+    session = session or get_rpc_session()
+    virtual = clock.VirtualClock()
+    clock.use_clock(virtual)
+    blocks = transactions = 0
+    started = time.perf_counter()
+
+    try:
+        while True:
+            tip = await get_slot(session)
+            if tip <= cursor:
+                break
+            if tip - cursor > MAX_BACKFILL_SLOTS:
+                print(f"[⚠️] {tip - cursor} slots behind, backfilling the last {MAX_BACKFILL_SLOTS} only")
+                cursor = tip - MAX_BACKFILL_SLOTS
+
+            for start in range(cursor + 1, tip + 1, FETCH_CONCURRENCY):
+                slots = range(start, min(start + FETCH_CONCURRENCY, tip + 1))
+                fetched = await asyncio.gather(*(get_block(session, slot) for slot in slots))
+                for slot, block in zip(slots, fetched):
+                    if block is not None:
+                        block_time, block_txs = block
+                        if block_time is not None:
+                            virtual.set(block_time)
+                        for tx in block_txs:
+                            await dispatcher.dispatch_transaction(tx.transaction, tx.log_messages, tx.inner_instructions)
+                        blocks += 1
+                        transactions += len(block_txs)
+                    dispatcher.cursor = slot
+                    await drain(dispatcher)
+            cursor = tip
+    except Exception as e:
+        print(f"[⚠️] Backfill stopped at slot {dispatcher.cursor}: {e}")
+    finally:
+        clock.use_clock(None)
+
+    if debug:
+        print(f"⏩ Backfilled {blocks} blocks / {transactions} transactions "
+              f"up to slot {dispatcher.cursor} in {time.perf_counter() - started:.2f}s")
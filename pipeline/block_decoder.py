@@ -0,0 +1,214 @@
+# block_decoder.py
+#
+# Turns Pump transactions into compact records (no solders objects) so the
+# decode can run either on the event loop or in worker processes
+# (see decode_pool.py). The dispatcher only routes these records.
+import base64
+import json
+import struct
+from typing import NamedTuple, Optional
+from config import PUMP_PROGRAM
+from pipeline.json_codec import decode_block_notification
+from pipeline.event_decoder import decode_events, get_event_layouts
+from pipeline import metrics
+from pipeline.tx_parser import first_signature, instruction_kinds, parse_pump_transaction
+
+CREATE_DISCRIMINATOR = struct.pack("<Q", 8576854823835016728)
+BUY_DISCRIMINATOR = struct.pack("<Q", 16927863322537952870)
+SELL_DISCRIMINATOR = struct.pack("<Q", 12502976635542562355)
+
+# Flags reported by the prefilter (tx_parser.instruction_kinds)
+KIND_CREATE = 1
+KIND_BUY = 2
+KIND_SELL = 4
+KIND_CPI = 8  # Pump called by another program (meta.innerInstructions), decoded with the top-level ones
+PUMP_KINDS = {CREATE_DISCRIMINATOR: KIND_CREATE, BUY_DISCRIMINATOR: KIND_BUY, SELL_DISCRIMINATOR: KIND_SELL}
+
+# passed - false_positive = transactions that gave at least one instruction record
+PREFILTER_REJECTED = metrics.counter("pump_prefilter_total", "Transactions seen by the instruction prefilter", result="rejected")
+PREFILTER_PASSED = metrics.counter("pump_prefilter_total", "Transactions seen by the instruction prefilter", result="passed")
+PREFILTER_FALSE_POSITIVE = metrics.counter("pump_prefilter_false_positives_total", "Prefilter hits without any instruction record")
+PREFILTER_COUNTERS = {
+    "prefilter_rejected": PREFILTER_REJECTED,
+    "prefilter_passed": PREFILTER_PASSED,
+    "prefilter_false_positive": PREFILTER_FALSE_POSITIVE,
+}
+
+# buy: amount, maxSolCost | sell: amount, minSolOutput
+TRADE_ARGS = struct.Struct("<QQ")
+CURVE_EVENTS = ("TradeEvent", "CompleteEvent")
+PUMP_PROGRAM_ID = str(PUMP_PROGRAM)  # as in the "Program <id> invoke [n]" log lines
+# Longueur base58 max des données d'une instruction interne décodée : buy/sell
+# (24-26 octets) passent, les events (self-CPI) et create sont ignorés
+INNER_TRADE_DATA_MAX = 40
+
+
+class TradeRecord(NamedTuple):
+    signature: bytes
+    mint: bytes  # raw 32-byte key
+    discriminator: bytes
+    token_amount: int  # raw u64 (6 decimals)
+    sol_amount: int  # lamports
+    actor: Optional[bytes]  # raw 32-byte key of the trader
+
+
+class CurveRecord(NamedTuple):
+    signature: bytes
+    mint: bytes  # raw 32-byte key
+    virtual_sol_reserves: int
+    virtual_token_reserves: int
+    complete: bool = False  # CompleteEvent : la courbe migre (pas de réserves)
+
+
+class CreateRecord(NamedTuple):
+    signature: bytes
+    accounts: tuple  # raw 32-byte keys of the create instruction accounts
+    data: bytes
+
+
+class LookupRecord(NamedTuple):
+    signature: bytes
+    raw: bytes  # v0 transaction whose trades need its address lookup tables (alt_store.py)
+    inner: Optional[list] = None  # its inner instructions (json_codec.InnerInstruction)
+
+
+def load_account_indexes(account_name, idl_path='idl/pump_fun_idl.json'):
+    """discriminator -> position of `account_name` in the buy/sell accounts."""
+    with open(idl_path, 'r') as f:
+        idl = json.load(f)
+
+    result = {}
+    for instr in idl['instructions']:
+        name = instr['name']
+        for ix_discrim, ix_name in [
+            (BUY_DISCRIMINATOR, "buy"),
+            (SELL_DISCRIMINATOR, "sell")
+        ]:
+            if name == ix_name:
+                for idx, acc in enumerate(instr['accounts']):
+                    if acc['name'] == account_name:
+                        result[ix_discrim] = idx
+                        break
+                else:
+                    print(f"[⚠️] Warning: '{account_name}' not found in instruction '{ix_name}'")
+    return result
+
+
+# Cached per process (workers load the IDL once)
+_account_indexes = None
+
+
+def get_account_indexes():
+    global _account_indexes
+    if _account_indexes is None:
+        _account_indexes = (load_account_indexes("mint"), load_account_indexes("user"))
+    return _account_indexes
+
+
+def _count(counts, outcome):
+    # counts : comptes d'un worker du decode pool, ajoutés aux compteurs par route_decoded_blocks
+    if counts is None:
+        PREFILTER_COUNTERS[outcome].inc()
+    else:
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+
+def decode_transaction(raw_bytes, mint_indexes, user_indexes, log_messages=None, inner_instructions=None, counts=None):
+    """Returns (signature, records) or None if the transaction has nothing for the pipeline."""
+    records = []
+
+    kinds = instruction_kinds(
+        raw_bytes, PUMP_KINDS, inner=inner_instructions, inner_kind=KIND_CPI, max_inner_data=INNER_TRADE_DATA_MAX
+    )
+    if kinds:
+        _count(counts, "prefilter_passed")
+        inner = inner_instructions if kinds & KIND_CPI else None
+        transaction = parse_pump_transaction(raw_bytes, inner=inner, max_inner_data=INNER_TRADE_DATA_MAX)
+        if transaction is not None:
+            decode_instructions(transaction, mint_indexes, user_indexes, records, inner)
+        if not records:
+            _count(counts, "prefilter_false_positive")
+    else:
+        _count(counts, "prefilter_rejected")
+
+    if log_messages:
+        # Reserves after each trade (TradeEvent) : prix sans appel RPC
+        signature = first_signature(raw_bytes)
+        for event in decode_events(log_messages, get_event_layouts(), CURVE_EVENTS, PUMP_PROGRAM_ID):
+            if type(event).__name__ == "CompleteEvent":
+                records.append(CurveRecord(signature, event.mint, 0, 0, True))
+            else:
+                records.append(CurveRecord(signature, event.mint, event.virtualSolReserves, event.virtualTokenReserves))
+
+    if not records:
+        return None
+    return records[0].signature, records
+
+
+def decode_instructions(transaction, mint_indexes, user_indexes, records, inner=None):
+    signature = transaction.signature
+    first = len(records)
+    for ix in transaction.instructions:
+        discriminator = ix.discriminator
+
+        if discriminator == CREATE_DISCRIMINATOR:
+            accounts = tuple(transaction.key(i) for i in ix.accounts if i < transaction.num_keys)
+            records.append(CreateRecord(signature, accounts, bytes(ix.data)))
+
+        elif discriminator in mint_indexes:
+            mint_idx = mint_indexes[discriminator]
+            if mint_idx >= len(ix.accounts):
+                print(f"[⚠️] mint_idx {mint_idx} out of bounds for accounts list of length {len(ix.accounts)}")
+                continue
+
+            mint = transaction.account(ix, mint_idx)
+            user_idx = user_indexes.get(discriminator, 6)
+            actor = transaction.account(ix, user_idx)
+            if transaction.loaded is None and transaction.lookups_offset is not None and (
+                mint is None or (actor is None and user_idx < len(ix.accounts))
+            ):
+                # Mint ou trader chargé depuis une lookup table : toute la transaction
+                # est décodée à nouveau par le dispatcher une fois les tables connues
+                del records[first:]
+                records.append(LookupRecord(signature, bytes(transaction.raw), inner))
+                return
+            if mint is None or len(ix.data) < 8 + TRADE_ARGS.size:
+                continue  # Truncated data
+
+            token_amount, sol_amount = TRADE_ARGS.unpack_from(ix.data, 8)
+            records.append(TradeRecord(signature, mint, discriminator, token_amount, sol_amount, actor))
+
+
+def decode_block(transactions, mint_indexes, user_indexes, counts=None):
+    """Decode the successful transactions of a block -> list of (signature, records).
+    counts: optional dict, incremented per outcome ("parsed", "filtered", "error", "prefilter_*")
+    instead of the counters of this process."""
+    decoded = []
+    for tx in transactions:
+        try:
+            result = decode_transaction(
+                base64.b64decode(tx.transaction), mint_indexes, user_indexes, tx.log_messages, tx.inner_instructions,
+                counts=counts,
+            )
+        except Exception as e:
+            print(f"[⚠️] Failed to parse transaction: {e}")
+            result, outcome = None, "error"
+        else:
+            outcome = "parsed" if result else "filtered"
+        if counts is not None:
+            counts[outcome] = counts.get(outcome, 0) + 1
+        if result:
+            decoded.append(result)
+    return decoded
+
+
+def decode_block_frame(message):
+    """Full blockNotification frame (str/bytes) -> (slot, list of (signature, records), counts).
+    Runs in the decode pool workers, whose metrics are not scraped: the counts are
+    added to the counters of the event loop process by route_decoded_blocks."""
+    counts = {}
+    slot, transactions = decode_block_notification(message)
+    if not transactions:
+        return slot, [], counts
+    mint_indexes, user_indexes = get_account_indexes()
+    return slot, decode_block(transactions, mint_indexes, user_indexes, counts), counts
@@ -0,0 +1,33 @@
+# clock.py
+#
+# Time source of the pipeline: the wall clock in production, a virtual clock
+# driven by the recorded receive timestamps during a replay (pipeline/replay.py),
+# so that the monitors and the rules see the time of the original stream.
+import time
+
+
+class VirtualClock:
+    __slots__ = ("current",)
+
+    def __init__(self, start=0.0):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def set(self, timestamp):
+        if timestamp > self.current:
+            self.current = timestamp  # Le temps ne recule jamais
+
+
+_clock = None  # None : horloge murale
+
+
+def now():
+    return time.time() if _clock is None else _clock.now()
+
+
+def use_clock(clock):
+    """Install a virtual clock (None restores the wall clock)."""
+    global _clock
+    _clock = clock
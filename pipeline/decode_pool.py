@@ -0,0 +1,47 @@
+# decode_pool.py
+#
+# Optional multi-core decode stage: raw blockNotification frames are parsed
+# (json + transaction decode) in worker processes, which send back compact
+# records. The event loop then only routes them (dispatcher.dispatch_records).
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pipeline.block_decoder import decode_block_frame, get_account_indexes
+from pipeline.dispatcher import DECODE_COUNTERS
+
+
+def _init_worker():
+    # Charge l'IDL une seule fois par worker
+    get_account_indexes()
+
+
+class BlockDecodePool:
+    def __init__(self, workers=None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def submit(self, message):
+        """Schedule the decode of one frame, returns an asyncio future."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, decode_block_frame, message)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def route_decoded_blocks(dispatcher, pending: asyncio.Queue):
+    """Await decoded frames in arrival order and route their records."""
+    while True:
+        future = await pending.get()
+        try:
+            slot, decoded, counts = await future
+        except Exception as e:
+            print(f"[⚠️] Block decode failed: {e}")
+            continue
+        # Les compteurs des workers ne sont pas ceux du process exposé sur /metrics
+        for outcome, count in counts.items():
+            DECODE_COUNTERS[outcome].inc(count)
+        for signature, records in decoded:
+            await dispatcher.dispatch_records(signature, records)
+        if slot is not None:
+            dispatcher.cursor = slot
@@ -0,0 +1,32 @@
+# dedup.py
+#
+# Bounded "already seen" set for the hot path (signatures, mints).
+# Two rotating sets: keys go into `current`; when it is full it becomes
+# `previous` and the old `previous` is dropped in one go. Insert, lookup and
+# eviction are O(1), and at least the last `capacity` keys are remembered
+# (at most 2 x capacity are kept).
+
+
+class RecentSet:
+    __slots__ = ("capacity", "current", "previous")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.current = set()
+        self.previous = set()
+
+    def __contains__(self, key):
+        return key in self.current or key in self.previous
+
+    def __len__(self):
+        return len(self.current) + len(self.previous)
+
+    def add(self, key) -> bool:
+        """Remember `key`. Returns False if it was already seen."""
+        if key in self.current or key in self.previous:
+            return False
+        if len(self.current) >= self.capacity:
+            self.previous = self.current
+            self.current = set()
+        self.current.add(key)
+        return True
@@ -1,106 +1,189 @@
-import asyncio
-import json
 import base64
-import struct
-import time
-from collections import defaultdict,deque
-from solders.transaction import VersionedTransaction
-from config import PUMP_PROGRAM
-
-CREATE_DISCRIMINATOR = struct.pack("<Q", 8576854823835016728)
-BUY_DISCRIMINATOR = struct.pack("<Q", 16927863322537952870)
-SELL_DISCRIMINATOR = struct.pack("<Q", 12502976635542562355)
-
-
-
+from pipeline import clock, metrics
+from pipeline.alt_store import AltStore
+from pipeline.dedup import RecentSet
+from pipeline.event_queue import DROP_OLDEST, BoundedEventQueue, QueueBudget
+from collections import defaultdict
+from solders.pubkey import Pubkey
+from pipeline.B_projects_monitoring.curve_state import price_from_reserves
+from pipeline.tx_parser import parse_pump_transaction
+from pipeline.block_decoder import (
+    INNER_TRADE_DATA_MAX,
+    PREFILTER_COUNTERS,
+    CreateRecord,
+    CurveRecord,
+    LookupRecord,
+    decode_instructions,
+    decode_transaction,
+    load_account_indexes,
+)
+
+MONITOR_QUEUE_SIZE = 1000  # événements en attente par token
+MONITOR_QUEUE_POLICY = DROP_OLDEST  # DROP_OLDEST ou PAUSE ; les prix passent par un slot conflaté (voir event_queue.py)
+WATCHER_QUEUE_SIZE = 10000
+SEEN_SIGNATURES = 10000  # signatures récentes gardées pour le dédoublonnage
+MAX_PENDING_EVENTS = 200_000  # budget mémoire global des queues de monitors (~200 o / événement)
+
+TX_PARSED = metrics.counter("pump_transactions_total", "Transactions seen by dispatch_transaction", result="parsed")
+TX_FILTERED = metrics.counter("pump_transactions_total", "Transactions seen by dispatch_transaction", result="filtered")
+TX_ERRORS = metrics.counter("pump_transactions_total", "Transactions seen by dispatch_transaction", result="error")
+TX_DUPLICATES = metrics.counter("pump_duplicate_transactions_total", "Transactions dropped as already seen")
+TRADES_ROUTED = metrics.counter("pump_records_routed_total", "Records routed by the dispatcher", kind="trade")
+CURVES_ROUTED = metrics.counter("pump_records_routed_total", "Records routed by the dispatcher", kind="curve")
+CREATES_ROUTED = metrics.counter("pump_records_routed_total", "Records routed by the dispatcher", kind="create")
+# Comptes renvoyés par les workers du decode pool (block_decoder.decode_block_frame)
+DECODE_COUNTERS = {"parsed": TX_PARSED, "filtered": TX_FILTERED, "error": TX_ERRORS, **PREFILTER_COUNTERS}
 
 
 class ProjectDispatcher:
-    def __init__(self):
-        self.watcher_queue = asyncio.Queue()
-        self.monitor_queues = defaultdict(asyncio.Queue)
+    def __init__(self, watch_creations=True, queue_size=MONITOR_QUEUE_SIZE, queue_policy=MONITOR_QUEUE_POLICY,
+                 max_pending_events=MAX_PENDING_EVENTS):
+        self.watcher_queue = BoundedEventQueue(WATCHER_QUEUE_SIZE, DROP_OLDEST)
+        self.watch_creations = watch_creations  # False when creations come from another stream (watcher.py)
+        self.queue_class = BoundedEventQueue
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.queue_budget = QueueBudget(max_pending_events)
+        self.monitor_queues = {}  # mint -> queue, created at registration only
         self.monitored_projects = set()
+        self.mint_keys = {}  # raw 32-byte mint key -> mint (base58), for O(1) lookup on the hot path
         self.project_definitions = {}  # mint -> project (with name, etc.)
         self.mint_index_by_discriminator = self._load_mint_indexes()
-        self.seen_signatures = deque(maxlen=10000)  # for duplicate filtering
+        self.user_index_by_discriminator = load_account_indexes("user")
+        self.seen_signatures = RecentSet(SEEN_SIGNATURES)  # raw 64-byte signatures, for duplicate filtering
+        self.alt_store = AltStore()  # lookup tables of v0 trades, run() started by main
+        self.cursor = None  # slot of the last block dispatched (snapshot.py, backfill.py)
         self.last_activity = defaultdict(lambda: 0)  # mint -> last activity timestamp
+        self.curve_reserves = {}  # mint -> (virtual_sol_reserves, virtual_token_reserves) from TradeEvent logs
+        self.last_price_event = {}  # mint -> timestamp of the last TradeEvent price
+        self.completed_curves = set()  # mints whose bonding curve is complete (migrated)
+        self.register_callbacks = []  # async callbacks(project), ex: curve subscriptions
+        self.unregister_callbacks = []  # async callbacks(mint)
+        self._register_metrics()
+
+    def _register_metrics(self):
+        # Évaluées au scrape seulement : rien sur le chemin chaud, pas de série par mint
+        metrics.gauge("pump_watcher_queue_depth", "Pending records in watcher_queue", self.watcher_queue.qsize)
+        metrics.gauge("pump_monitor_queue_depth_max", "Deepest monitor queue",
+                      lambda: max((q.qsize() for q in self.monitor_queues.values()), default=0))
+        metrics.gauge("pump_monitor_pending_events", "Events pending in all monitor queues (budget)",
+                      lambda: self.queue_budget.used)
+        metrics.gauge("pump_active_monitors", "Monitored projects", lambda: len(self.monitored_projects))
 
     def _load_mint_indexes(self, idl_path='idl/pump_fun_idl.json'):
-        with open(idl_path, 'r') as f:
-            idl = json.load(f)
-
-        result = {}
-        for instr in idl['instructions']:
-            name = instr['name']
-            for ix_discrim, ix_name in [
-                (BUY_DISCRIMINATOR, "buy"),
-                (SELL_DISCRIMINATOR, "sell")
-            ]:
-                if name == ix_name:
-                    for idx, acc in enumerate(instr['accounts']):
-                        if acc['name'] == 'mint':
-                            result[ix_discrim] = idx
-                            break
-                    else:
-                        print(f"[⚠️] Warning: 'mint' not found in instruction '{ix_name}'")
-        return result
+        return load_account_indexes("mint", idl_path)
 
     def record_activity(self, mint):
-        self.last_activity[mint] = time.time()
+        self.last_activity[mint] = clock.now()
 
     async def register_project(self, project):
         mint = project["mint"]
         self.monitored_projects.add(mint)
+        self.mint_keys[bytes(Pubkey.from_string(mint))] = mint
         self.project_definitions[mint] = project
+        if mint not in self.monitor_queues:
+            self.monitor_queues[mint] = self.queue_class(self.queue_size, self.queue_policy, self.queue_budget)
         print(f"✅ Registered project for monitoring: {project['name']} ({mint})")
+        for callback in self.register_callbacks:
+            await callback(project)
 
     async def unregister_project(self, mint):
         self.monitored_projects.discard(mint)
-        self.monitor_queues.pop(mint, None)
+        self.mint_keys.pop(bytes(Pubkey.from_string(mint)), None)
+        queue = self.monitor_queues.pop(mint, None)
+        if queue is not None:
+            queue.detach()
         self.project_definitions.pop(mint, None)
+        self.last_activity.pop(mint, None)
+        self.curve_reserves.pop(mint, None)
+        self.last_price_event.pop(mint, None)
+        self.completed_curves.discard(mint)
+        for callback in self.unregister_callbacks:
+            await callback(mint)
+
+    async def update_curve(self, mint, virtual_sol_reserves, virtual_token_reserves, complete=False):
+        """Reserves after a trade (TradeEvent) -> price_update for the monitor, no RPC.
+        A complete curve (CompleteEvent, fetcher or push) ends the monitor with a curve_complete event."""
+        queue = self.monitor_queues.get(mint)
+        if queue is None:
+            return  # Projet non suivi (ou déjà retiré)
+        if complete:
+            if mint not in self.completed_curves:
+                # La courbe est terminée : le token migre hors de Pump
+                self.completed_curves.add(mint)
+                print(f"🎓 Bonding curve complete (migration) for {mint}")
+                await queue.put(("curve_complete",))
+            return
+        try:
+            price = price_from_reserves(virtual_sol_reserves, virtual_token_reserves)
+        except ValueError:
+            return
+        self.curve_reserves[mint] = (virtual_sol_reserves, virtual_token_reserves)
+        self.last_price_event[mint] = clock.now()
+        await queue.put(("price_update", price))
 
-    async def dispatch_transaction(self, raw_tx):
+    async def dispatch_transaction(self, raw_tx, log_messages=None, inner_instructions=None):
         raw_bytes = base64.b64decode(raw_tx)
 
-        if not any(d in raw_bytes for d in [CREATE_DISCRIMINATOR, BUY_DISCRIMINATOR, SELL_DISCRIMINATOR]):
-            return
-
         try:
-            transaction = VersionedTransaction.from_bytes(raw_bytes)
+            decoded = decode_transaction(
+                raw_bytes, self.mint_index_by_discriminator, self.user_index_by_discriminator, log_messages,
+                inner_instructions
+            )
         except Exception as e:
+            TX_ERRORS.inc()
             print(f"[⚠️] Failed to parse transaction: {e}")
             return
+        if decoded is None:
+            TX_FILTERED.inc()
+            return  # No Pump instruction
+        TX_PARSED.inc()
 
-        sig = str(transaction.signatures[0])
-        if sig in self.seen_signatures:
-            return  # Duplicate, already processed
-        self.seen_signatures.append(sig)
-
-        keys = transaction.message.account_keys
+        await self.dispatch_records(*decoded)
 
-        for ix in transaction.message.instructions:
-            discriminator = ix.data[:8]
-            program_id = str(keys[ix.program_id_index])
+    async def dispatch_records(self, signature, records):
+        """Route records decoded in-process or by the decode pool."""
+        if not self.seen_signatures.add(signature):
+            TX_DUPLICATES.inc()
+            return  # Duplicate, already processed
+        await self.route_records(records)
 
-            if program_id != str(PUMP_PROGRAM):
+    async def route_records(self, records):
+        for record in records:
+            if type(record) is LookupRecord:
+                await self.route_lookup(record)
                 continue
 
-            if discriminator == CREATE_DISCRIMINATOR:
-                await self.watcher_queue.put((transaction, ix, discriminator))
-
-            elif discriminator in [BUY_DISCRIMINATOR, SELL_DISCRIMINATOR]:
-                mint_idx = self.mint_index_by_discriminator.get(discriminator)
-                if mint_idx is None:
-                    print(f"[⚠️] No mint index configured for discriminator: {discriminator.hex()}")
-                    continue
-
-                accounts = [str(keys[i]) for i in ix.accounts if i < len(keys)]
-                if mint_idx >= len(accounts):
-                    print(f"[⚠️] mint_idx {mint_idx} out of bounds for accounts list of length {len(accounts)}")
-                    continue
+            if type(record) is CreateRecord:
+                if self.watch_creations:
+                    CREATES_ROUTED.inc()
+                    await self.watcher_queue.put(record)
+                continue
 
-                mint = accounts[mint_idx]
+            mint = self.mint_keys.get(record.mint)
+            if mint is None:
+                continue
 
-                if mint in self.monitored_projects:
-                    self.record_activity(mint)  # ✅ marquer activité
-                    await self.monitor_queues[mint].put((transaction, ix, discriminator))
+            if type(record) is CurveRecord:
+                CURVES_ROUTED.inc()
+                await self.update_curve(mint, record.virtual_sol_reserves, record.virtual_token_reserves, record.complete)
+            else:
+                TRADES_ROUTED.inc()
+                self.record_activity(mint)  # ✅ marquer activité
+                await self.monitor_queues[mint].put(record)
+
+    async def route_lookup(self, record):
+        """Trades of a v0 transaction whose accounts come from address lookup tables."""
+        transaction = parse_pump_transaction(record.raw, inner=record.inner, max_inner_data=INNER_TRADE_DATA_MAX)
+        if transaction is None:
+            return
+        lookups = transaction.address_table_lookups()
+        transaction.loaded = self.alt_store.resolve(lookups)
+        if transaction.loaded is None:
+            self.alt_store.park(record, lookups)  # Tables chargées en batch, puis route_lookup à nouveau
+            return
+        records = []
+        decode_instructions(
+            transaction, self.mint_index_by_discriminator, self.user_index_by_discriminator, records, record.inner
+        )
+        await self.route_records(records)
@@ -0,0 +1,98 @@
+# event_decoder.py
+#
+# Decodes the Anchor events emitted by the Pump program ("Program data: <base64>"
+# lines of meta.logMessages), using the event layouts of the IDL.
+# TradeEvent carries the virtual reserves after each trade: the price of a
+# mint can be tracked from the block stream without any RPC call.
+import base64
+import hashlib
+import json
+import struct
+from collections import namedtuple
+
+PROGRAM_PREFIX = "Program "
+PROGRAM_DATA_PREFIX = "Program data: "
+
+# IDL type -> struct format (fixed-size types only)
+_FORMATS = {
+    "publicKey": "32s",
+    "u64": "Q",
+    "i64": "q",
+    "u32": "I",
+    "u8": "B",
+    "bool": "?",
+}
+
+
+def event_discriminator(name) -> bytes:
+    return hashlib.sha256(f"event:{name}".encode()).digest()[:8]
+
+
+class EventLayout:
+    __slots__ = ("name", "discriminator", "struct", "tuple_type")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.discriminator = event_discriminator(name)
+        self.struct = struct.Struct("<" + "".join(_FORMATS[f["type"]] for f in fields))
+        self.tuple_type = namedtuple(name, [f["name"] for f in fields])
+
+    def decode(self, data):
+        # Les champs ajoutés en fin d'event par le programme sont ignorés
+        return self.tuple_type._make(self.struct.unpack_from(data, 8))
+
+
+def load_event_layouts(idl_path='idl/pump_fun_idl.json'):
+    """discriminator -> EventLayout, for the fixed-size events of the IDL."""
+    with open(idl_path, 'r') as f:
+        idl = json.load(f)
+
+    layouts = {}
+    for event in idl.get('events', []):
+        if any(field['type'] not in _FORMATS for field in event['fields']):
+            continue  # ex: CreateEvent (strings)
+        layout = EventLayout(event['name'], event['fields'])
+        layouts[layout.discriminator] = layout
+    return layouts
+
+
+# Cached per process
+_event_layouts = None
+
+
+def get_event_layouts():
+    global _event_layouts
+    if _event_layouts is None:
+        _event_layouts = load_event_layouts()
+    return _event_layouts
+
+
+def decode_events(log_messages, layouts, names=None, program=None):
+    """Yield the decoded events found in a transaction's log messages.
+    program (base58 id): only the lines logged while `program` is the running
+    one, following the "Program <id> invoke [n]" / "Program <id> success|failed"
+    call stack (another program can log the same bytes)."""
+    stack = []
+    for line in log_messages:
+        if not line.startswith(PROGRAM_DATA_PREFIX):
+            if program is not None and line.startswith(PROGRAM_PREFIX):
+                parts = line.split(" ", 3)
+                if len(parts) > 2 and not parts[1].endswith(":"):  # pas "Program log:", "Program return:"...
+                    if parts[2] == "invoke":
+                        stack.append(parts[1])
+                    elif parts[2] in ("success", "failed:") and stack:
+                        stack.pop()
+            continue
+        if program is not None and (not stack or stack[-1] != program):
+            continue  # Émis par un autre programme
+        try:
+            data = base64.b64decode(line[len(PROGRAM_DATA_PREFIX):])
+        except ValueError:
+            continue
+        layout = layouts.get(data[:8])
+        if layout is None or (names is not None and layout.name not in names):
+            continue
+        if len(data) < 8 + layout.struct.size:
+            continue  # Event tronqué
+        yield layout.decode(data)
+
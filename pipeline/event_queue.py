@@ -0,0 +1,149 @@
+# event_queue.py
+#
+# Bounded asyncio queues between the dispatcher and its consumers, with a
+# load-shedding policy when a consumer falls behind:
+#   - DROP_OLDEST : the oldest pending event is dropped for the new one;
+#   - PAUSE       : put() waits for space (backpressure up to the ingest).
+# A QueueBudget shared by all the monitor queues caps the total number of
+# pending events (memory budget): once exhausted, DROP_OLDEST sheds the oldest
+# event of the deepest queue instead of growing. None (the monitor stop sentinel) always gets through; it closes the
+# queue, as detach() does: later events are dropped and putters blocked by
+# PAUSE are released, so a stopped monitor never stalls the ingest.
+#
+# State events ("price_update") are conflated: each kind has a single
+# "latest value" slot that is overwritten instead of enqueued. The slot keeps
+# its place in the stream: it is handed to the consumer right after the
+# events queued before its last write. A busy monitor never replays stale
+# prices one by one, and never sees a price ahead of the trades behind it.
+import asyncio
+from pipeline import metrics
+
+DROP_OLDEST = "drop_oldest"
+PAUSE = "pause"
+
+CONFLATED_KINDS = frozenset({"price_update"})
+
+DROPPED_CAPACITY = metrics.counter("pump_queue_dropped_total", "Events shed by the bounded queues", reason="capacity")
+DROPPED_BUDGET = metrics.counter("pump_queue_dropped_total", "Events shed by the bounded queues", reason="budget")
+COALESCED = metrics.counter("pump_queue_coalesced_total", "State updates overwritten by a newer one before delivery")
+
+
+def is_conflated(item):
+    return type(item) is tuple and item[0] in CONFLATED_KINDS
+
+
+class QueueBudget:
+    __slots__ = ("limit", "used", "queues")
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.queues = set()  # BoundedEventQueue partageant ce budget
+
+    def exhausted(self):
+        return self.used >= self.limit
+
+    def deepest(self):
+        """Queue with the most pending events among those allowed to shed (not PAUSE)."""
+        return max((q for q in self.queues if q.policy != PAUSE), key=lambda q: len(q._queue), default=None)
+
+
+class BoundedEventQueue(asyncio.Queue):
+    def __init__(self, capacity, policy=DROP_OLDEST, budget=None):
+        super().__init__()  # Borne gérée ici : la sentinelle None passe toujours
+        self.capacity = capacity
+        self.policy = policy
+        self.budget = budget
+        self.dropped = 0
+        self.latest = {}  # kind -> (position, dernier événement d'état non lu)
+        self.queued = 0  # événements entrés dans la file
+        self.consumed = 0  # événements sortis de la file (lus ou jetés)
+        self.closed = False  # sentinelle reçue ou queue retirée : plus de consommateur
+        self._space = None  # asyncio.Event, PAUSE uniquement
+        if budget is not None:
+            budget.queues.add(self)
+
+    def close(self):
+        """No consumer anymore: new events are dropped and blocked putters released."""
+        self.closed = True
+        if self._space is not None:
+            self._space.set()
+
+    def detach(self):
+        """Give the pending events back to the budget (queue removed from the dispatcher)."""
+        self.close()
+        if self.budget is not None:
+            self.budget.used -= sum(1 for item in self._queue if item is not None)
+            self.budget.queues.discard(self)
+            self.budget = None
+
+    # asyncio.Queue vérifie empty() avant _get() : les slots comptent comme des éléments
+    def qsize(self):
+        return len(self._queue) + len(self.latest)
+
+    def empty(self):
+        return not self._queue and not self.latest
+
+    def _put(self, item):
+        if item is None:
+            self.close()  # Le monitor s'arrête à la sentinelle : les putters en attente repartent
+        elif is_conflated(item):
+            if item[0] in self.latest:
+                COALESCED.inc()
+            # Écrase la valeur non lue, livrée après les événements déjà en file
+            self.latest[item[0]] = (self.queued, item)
+            return
+        super()._put(item)
+        self.queued += 1
+        if self.budget is not None and item is not None:
+            self.budget.used += 1
+
+    def _get(self):
+        if self.latest:
+            kind, (position, item) = min(self.latest.items(), key=lambda slot: slot[1][0])
+            if position <= self.consumed:
+                # Tout ce qui précédait la dernière écriture du slot a été livré
+                del self.latest[kind]
+                return item
+        item = super()._get()
+        self.consumed += 1
+        if self.budget is not None and item is not None:
+            self.budget.used -= 1
+        if self._space is not None and len(self._queue) < self.capacity:
+            self._space.set()
+        return item
+
+    def _drop_oldest(self, counter):
+        item = self._queue.popleft()
+        self.consumed += 1
+        if self.budget is not None and item is not None:
+            self.budget.used -= 1
+        self.dropped += 1
+        counter.inc()
+
+    async def put(self, item):
+        if self.policy == PAUSE and item is not None and not is_conflated(item):
+            while len(self._queue) >= self.capacity and not self.closed:
+                if self._space is None:
+                    self._space = asyncio.Event()
+                self._space.clear()
+                await self._space.wait()
+        self.put_nowait(item)
+
+    def put_nowait(self, item):
+        if item is not None and self.closed:
+            self.dropped += 1  # Plus personne ne lit cette queue
+            return
+        if item is not None and self.policy != PAUSE and not is_conflated(item):
+            queue = self._queue
+            if len(queue) >= self.capacity:
+                self._drop_oldest(DROPPED_CAPACITY)
+            elif self.budget is not None and self.budget.exhausted():
+                # Le budget est partagé : c'est le monitor le plus en retard qui perd un événement
+                victim = self.budget.deepest()
+                if victim is None or not victim._queue:
+                    self.dropped += 1
+                    DROPPED_BUDGET.inc()
+                    return
+                victim._drop_oldest(DROPPED_BUDGET)
+        super().put_nowait(item)
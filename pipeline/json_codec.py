@@ -0,0 +1,141 @@
+# json_codec.py
+#
+# Pluggable decoder for the websocket ingest.
+#   - msgspec installed : typed partial decode, only
+#     params.result.value.block.transactions[*].{transaction, meta.err,
+#     meta.logMessages, meta.innerInstructions} is materialized, everything else
+#     (balances, rewards...) is skipped.
+#   - orjson installed  : fast full decode.
+#   - otherwise         : stdlib json.
+import json
+from typing import Any, List, NamedTuple, Optional
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class InnerInstruction(NamedTuple):
+    program_id_index: int
+    accounts: List[int]
+    data: str  # base58
+
+
+class BlockTransaction(NamedTuple):
+    transaction: str  # base64-encoded wire transaction
+    log_messages: Optional[List[str]] = None
+    inner_instructions: Optional[list] = None  # CPI instructions of every top-level instruction, in order
+
+
+if orjson is not None:
+    loads = orjson.loads
+else:
+    loads = json.loads
+
+
+def _block_notification_from_dict(data):
+    value = data.get("params", {}).get("result", {}).get("value", {})
+    block = value.get("block")
+    if not block:
+        return None, None
+    return value.get("slot"), block_transactions(block)
+
+
+def _block_transactions_from_dict(data):
+    return _block_notification_from_dict(data)[1]
+
+
+def block_transactions(block):
+    """Block dict (blockNotification or getBlock, base64 encoding) -> successful BlockTransactions."""
+    transactions = []
+    for tx in block.get("transactions", []):
+        meta = tx.get("meta")
+        if not meta or meta.get("err") is not None:
+            continue  # skip failed transaction
+        inner = [
+            InnerInstruction(ix["programIdIndex"], ix["accounts"], ix["data"])
+            for group in meta.get("innerInstructions") or () for ix in group["instructions"]
+        ]
+        transactions.append(BlockTransaction(tx["transaction"][0], meta.get("logMessages"), inner or None))
+    return transactions
+
+
+if msgspec is not None:
+    class _InnerInstruction(msgspec.Struct, rename="camel"):
+        program_id_index: int
+        accounts: List[int]
+        data: str
+
+    class _InnerGroup(msgspec.Struct):
+        instructions: List[_InnerInstruction] = []
+
+    class _Meta(msgspec.Struct):
+        err: Any = None
+        logMessages: Optional[List[str]] = None
+        innerInstructions: Optional[List[_InnerGroup]] = None
+
+    class _Tx(msgspec.Struct):
+        transaction: List[str]
+        meta: Optional[_Meta] = None
+
+    class _Block(msgspec.Struct):
+        transactions: List[_Tx] = []
+
+    class _Value(msgspec.Struct):
+        slot: Optional[int] = None
+        block: Optional[_Block] = None
+
+    class _Result(msgspec.Struct):
+        value: Optional[_Value] = None
+
+    class _Params(msgspec.Struct):
+        result: Optional[_Result] = None
+
+    class _Notification(msgspec.Struct):
+        params: Optional[_Params] = None
+
+    _notification_decoder = msgspec.json.Decoder(_Notification)
+
+    def decode_block_notification(message):
+        try:
+            notification = _notification_decoder.decode(message)
+        except msgspec.ValidationError:
+            return None, None  # Pas une blockNotification attendue
+
+        params = notification.params
+        if params is None or params.result is None or params.result.value is None:
+            return None, None
+        value = params.result.value
+        if value.block is None:
+            return None, None
+        return value.slot, [
+            BlockTransaction(tx.transaction[0], tx.meta.logMessages, _flatten(tx.meta.innerInstructions))
+            for tx in value.block.transactions
+            if tx.meta is not None and tx.meta.err is None
+        ]
+
+    def _flatten(groups):
+        if not groups:
+            return None
+        if len(groups) == 1:
+            return groups[0].instructions or None
+        return [ix for group in groups for ix in group.instructions] or None
+
+    BACKEND = "msgspec"
+else:
+    def decode_block_notification(message):
+        """blockNotification frame -> (slot, successful BlockTransactions), or (None, None) for other messages."""
+        return _block_notification_from_dict(loads(message))
+
+    BACKEND = "orjson" if orjson is not None else "json"
+
+
+def decode_block_transactions(message):
+    """blockNotification frame -> successful BlockTransactions, or None for other messages."""
+    return decode_block_notification(message)[1]
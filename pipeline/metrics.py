@@ -0,0 +1,157 @@
+# metrics.py
+#
+# Minimal in-process metrics with a Prometheus text endpoint.
+# Hot-path cost: Counter.inc() is one attribute add, Histogram.observe() one
+# bisect on the bucket bounds. Queue depths and other gauges are callbacks,
+# evaluated only when /metrics is scraped.
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRICS_PORT = 9108
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # dernier : +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class GaugeCallback:
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn  # -> value, or {label value: value} for a labeled gauge
+
+
+# name -> [type, help, {labels tuple: metric}]
+_families = {}
+
+
+def _register(kind, name, help_text, labels, factory):
+    family = _families.setdefault(name, [kind, help_text, {}])
+    key = tuple(sorted(labels.items()))
+    metric = family[2].get(key)
+    if metric is None:
+        metric = family[2][key] = factory()
+    return metric
+
+
+def counter(name, help_text, **labels) -> Counter:
+    return _register("counter", name, help_text, labels, Counter)
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS, **labels) -> Histogram:
+    return _register("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+
+def gauge(name, help_text, fn, label=None, **labels):
+    """Gauge computed at scrape time. With `label`, fn() returns {label value: value}."""
+    family = _families.setdefault(name, ["gauge", help_text, {}])
+    family[2][tuple(sorted(labels.items()))] = GaugeCallback(fn if label is None else (label, fn))
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render() -> str:
+    """Prometheus text exposition format of every registered metric."""
+    lines = []
+    for name, (kind, help_text, metrics) in _families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, metric in metrics.items():
+            if kind == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+            elif kind == "histogram":
+                cumulative = 0
+                for bound, count in zip(metric.bounds + ("+Inf",), metric.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+            else:
+                try:
+                    if isinstance(metric.fn, tuple):
+                        label, fn = metric.fn
+                        for label_value, value in fn().items():
+                            lines.append(f"{name}{_format_labels(labels, [(label, label_value)])} {value}")
+                    else:
+                        lines.append(f"{name}{_format_labels(labels)} {metric.fn()}")
+                except Exception as e:
+                    lines.append(f"# {name}: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def track_rpc(method):
+    """Decorator: latency, request and error counters of an async RPC call."""
+    latency = histogram("pump_rpc_request_seconds", "RPC request latency", method=method)
+    requests = counter("pump_rpc_requests_total", "RPC requests", method=method)
+    errors = counter("pump_rpc_errors_total", "Failed RPC requests", method=method)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                requests.inc()
+                latency.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+EVENT_LOOP_LAG = histogram("pump_event_loop_lag_seconds", "Extra delay of a periodic asyncio.sleep")
+
+
+async def measure_event_loop_lag(interval=0.25):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(time.perf_counter() - start - interval, 0.0))
+
+
+async def start_metrics_server(host="127.0.0.1", port=METRICS_PORT):
+    """Serve GET /metrics (local only by default) and measure the event-loop lag."""
+    from aiohttp import web
+
+    async def handle(_request):
+        return web.Response(text=render(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    asyncio.create_task(measure_event_loop_lag())
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,197 @@
+# replay.py
+#
+# Record and replay of the raw block stream.
+#   - BlockRecorder appends the raw blockNotification frames, with their receive
+#     timestamp, to gzip segment files (append-only, rotated by size). Compression
+#     runs in a writer thread, off the event loop.
+#   - replay_blocks feeds a ProjectDispatcher from the segments at the original
+#     pace (or a multiple of it) or as fast as possible. The pipeline sees the
+#     recorded time through a VirtualClock (pipeline/clock.py).
+#
+# Backtest: python -m pipeline.replay <segments_dir> [--speed 1.0] [--strategies strategies.json]
+import argparse
+import asyncio
+import gzip
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from pipeline import clock
+from pipeline.json_codec import decode_block_notification
+
+FRAME_HEADER = struct.Struct("<dI")  # receive timestamp, frame length
+SEGMENT_BYTES = 256 << 20  # taille (non compressée) d'un segment
+SEGMENT_SUFFIX = ".seg.gz"
+COMPRESS_LEVEL = 3
+TICK_SEC = 0.5  # pas des ticks du rule scheduler en temps virtuel
+DRAIN_SPINS = 10000  # borne pour ne pas bloquer sur une queue sans consommateur
+
+
+class BlockRecorder:
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.frames = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._write_loop, name="block-recorder", daemon=True)
+        self.thread.start()
+
+    def write(self, message, recv_ts=None):
+        """Queue one raw frame (str or bytes), non-blocking."""
+        if isinstance(message, str):
+            message = message.encode()
+        self.frames.put((time.time() if recv_ts is None else recv_ts, message))
+
+    def close(self):
+        self.frames.put(None)
+        self.thread.join()
+
+    def _open_segment(self, timestamp):
+        name = f"blocks-{int(timestamp * 1000):015d}{SEGMENT_SUFFIX}"
+        return gzip.open(os.path.join(self.directory, name), "ab", compresslevel=COMPRESS_LEVEL)
+
+    def _write_loop(self):
+        segment = None
+        written = 0
+        try:
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                recv_ts, message = item
+                if segment is None or written >= self.segment_bytes:
+                    if segment is not None:
+                        segment.close()
+                    segment = self._open_segment(recv_ts)
+                    written = 0
+                segment.write(FRAME_HEADER.pack(recv_ts, len(message)))
+                segment.write(message)
+                written += FRAME_HEADER.size + len(message)
+                if self.frames.empty():
+                    segment.flush()  # Rien en attente : on rend les données lisibles
+        except Exception as e:
+            print(f"[⚠️] Block recorder stopped: {e}")
+        finally:
+            if segment is not None:
+                segment.close()
+
+
+def segment_paths(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def read_frames(directory):
+    """Yield (recv_ts, raw frame bytes) from every segment, in recording order."""
+    for path in segment_paths(directory):
+        with gzip.open(path, "rb") as f:
+            try:
+                while True:
+                    header = f.read(FRAME_HEADER.size)
+                    if len(header) < FRAME_HEADER.size:
+                        break
+                    recv_ts, length = FRAME_HEADER.unpack(header)
+                    frame = f.read(length)
+                    if len(frame) < length:
+                        break
+                    yield recv_ts, frame
+            except (EOFError, gzip.BadGzipFile, zlib.error):
+                # Segment tronqué (arrêt brutal de l'enregistrement)
+                print(f"[⚠️] Truncated segment: {path}")
+
+
+async def drain(dispatcher):
+    """Let the consumers (watcher, monitors) process everything queued so far."""
+    for _ in range(DRAIN_SPINS):
+        if not (
+            (dispatcher.watch_creations and dispatcher.watcher_queue.qsize())
+            or any(q.qsize() for q in dispatcher.monitor_queues.values())
+        ):
+            return
+        await asyncio.sleep(0)
+
+
+async def replay_blocks(dispatcher, directory, speed=None, tick=TICK_SEC, on_tick=None):
+    """Replay recorded frames into `dispatcher`.
+
+    speed=None replays as fast as possible, 1.0 at the recorded pace.
+    on_tick(now) is called every `tick` seconds of virtual time (ex: RuleScheduler.run_once).
+    Returns (frames, transactions, wall-clock seconds)."""
+    virtual = clock.VirtualClock()
+    clock.use_clock(virtual)
+    frames = transactions = 0
+    first_ts = next_tick = None
+    started = time.perf_counter()
+
+    try:
+        for recv_ts, frame in read_frames(directory):
+            if first_ts is None:
+                first_ts = recv_ts
+                next_tick = recv_ts + tick
+                virtual.set(recv_ts)
+
+            if speed:
+                delay = (recv_ts - first_ts) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            # Ticks échus avant cette frame, à leur heure virtuelle
+            while on_tick is not None and next_tick <= recv_ts:
+                virtual.set(next_tick)
+                on_tick(next_tick)
+                await drain(dispatcher)
+                next_tick += tick
+
+            virtual.set(recv_ts)
+            frames += 1
+            slot, block_transactions = decode_block_notification(frame)
+            if block_transactions:
+                transactions += len(block_transactions)
+                for tx in block_transactions:
+                    await dispatcher.dispatch_transaction(tx.transaction, tx.log_messages, tx.inner_instructions)
+            if slot is not None:
+                dispatcher.cursor = slot
+            await drain(dispatcher)
+    finally:
+        clock.use_clock(None)
+
+    return frames, transactions, time.perf_counter() - started
+
+
+async def _backtest(args):
+    from pipeline.dispatcher import ProjectDispatcher
+    from pipeline.strategy import compile_filters, load_strategies
+    from pipeline.A_projects_watcher.watcher_v2 import watch_new_projects
+    from pipeline.B_projects_monitoring.monirot_v2 import DEFAULT_SPEC, monitor_project
+    from pipeline.B_projects_monitoring.rule_scheduler import get_rule_scheduler
+
+    dispatcher = ProjectDispatcher()
+    strategies = load_strategies(args.strategies) if args.strategies else compile_filters(DEFAULT_SPEC)
+    scheduler = get_rule_scheduler(manual=True)
+
+    async def start_monitor(project):
+        # Lancé à l'enregistrement : pas de trade perdu entre deux frames
+        asyncio.create_task(
+            monitor_project(project, dispatcher, strategies=strategies.for_project(project), debug=args.debug)
+        )
+
+    dispatcher.register_callbacks.append(start_monitor)
+    asyncio.create_task(watch_new_projects(dispatcher, filters=strategies, debug=args.debug))
+
+    frames, transactions, elapsed = await replay_blocks(
+        dispatcher, args.directory, speed=args.speed, on_tick=scheduler.run_once
+    )
+    print(f"⏱️ Replayed {frames} frames / {transactions} transactions in {elapsed:.2f}s "
+          f"({frames / max(elapsed, 1e-9):.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded block segments through the pipeline")
+    parser.add_argument("directory")
+    parser.add_argument("--speed", type=float, default=None, help="1.0 = recorded pace (default: max speed)")
+    parser.add_argument("--strategies", default=None)
+    parser.add_argument("--debug", action="store_true")
+    asyncio.run(_backtest(parser.parse_args()))
@@ -4,10 +4,17 @@ import os
 import time
 import websockets
 from config import PUMP_PROGRAM
+from pipeline import metrics
+from pipeline.decode_pool import route_decoded_blocks
+from pipeline.json_codec import decode_block_notification
 
 SOLANA_NODE_WSS_ENDPOINT = os.environ["SOLANA_NODE_WSS_ENDPOINT"]
 
-async def rpc_listener(dispatcher, debug=False):
+FRAMES = metrics.counter("pump_ws_frames_total", "Websocket frames received")
+BLOCK_DECODE_SECONDS = metrics.histogram("pump_block_decode_seconds", "JSON decode time of a block frame")
+BLOCK_PROCESS_SECONDS = metrics.histogram("pump_block_process_seconds", "Decode + dispatch time of a block frame")
+
+async def rpc_listener(dispatcher, debug=False, decode_pool=None, recorder=None):
     subscription_payload = json.dumps({
         "jsonrpc": "2.0",
         "id": 1,
@@ -23,6 +30,12 @@ async def rpc_listener(dispatcher, debug=False):
         ]
     })
 
+    pending = None
+    if decode_pool is not None:
+        # Frames décodées en parallèle, routées dans l'ordre d'arrivée
+        pending = asyncio.Queue(maxsize=decode_pool.workers * 2)
+        asyncio.create_task(route_decoded_blocks(dispatcher, pending))
+
     while True:
         try:
             async with websockets.connect(SOLANA_NODE_WSS_ENDPOINT, ping_interval=20, ping_timeout=20) as ws:
@@ -39,17 +52,23 @@ async def rpc_listener(dispatcher, debug=False):
 
                     try:
                         message = await asyncio.wait_for(ws.recv(), timeout=30)
-                        data = json.loads(message)
+                        FRAMES.inc()
+                        if recorder is not None:
+                            recorder.write(message, time.time())  # Frame brute, pour le replay
 
-                        block = data.get("params", {}).get("result", {}).get("value", {}).get("block")
-                        if not block:
+                        if pending is not None:
+                            await pending.put(decode_pool.submit(message))
                             continue
 
-                        for tx in block.get("transactions", []):
-                            if not tx.get("meta") or tx["meta"].get("err") is not None:
-                                continue  # skip transaction
-                            raw_tx = tx["transaction"][0]  # base64-encoded
-                            await dispatcher.dispatch_transaction(raw_tx)
+                        start = time.perf_counter()
+                        slot, transactions = decode_block_notification(message)
+                        BLOCK_DECODE_SECONDS.observe(time.perf_counter() - start)
+                        if transactions:
+                            for tx in transactions:
+                                await dispatcher.dispatch_transaction(tx.transaction, tx.log_messages, tx.inner_instructions)
+                            BLOCK_PROCESS_SECONDS.observe(time.perf_counter() - start)
+                        if slot is not None:
+                            dispatcher.cursor = slot  # Bloc traité (reprise après snapshot)
 
                     except asyncio.TimeoutError:
                         if debug:
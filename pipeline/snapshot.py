@@ -0,0 +1,142 @@
+# snapshot.py
+#
+# Periodic snapshots of the live state for a warm restart:
+#   - the state_map of every running monitor (running stats, columnar trade
+#     log, per-second series, price history...) and its start time, so the
+#     rules keep their evaluation window;
+#   - the dispatcher registries (projects, curve reserves, seen signatures,
+#     lookup tables) and its cursor: slot of the last block dispatched.
+# One pickle file (protocol 5: the NumPy columns are stored as raw buffers),
+# written to a temporary file then renamed: a crash mid-write keeps the
+# previous snapshot. On startup restore() registers the projects again, the
+# monitors pick up their state with restore_state(), and backfill.catch_up()
+# dispatches the blocks after the cursor (getBlock, pipeline/backfill.py).
+# restore() unpickles whatever is at SNAPSHOT_FILE, and unpickling can run
+# arbitrary code: the file must be trusted (written by this process only).
+# pickle.dumps blocks the event loop: its duration is reported in
+# pump_event_loop_lag_seconds.
+import asyncio
+import os
+import pickle
+import time
+from pipeline import metrics
+
+SNAPSHOT_FILE = "data/snapshot.pkl"
+SNAPSHOT_INTERVAL = 5.0  # secondes entre deux snapshots
+MAX_SNAPSHOT_AGE = 600  # au-delà, les fenêtres des règles sont expirées : on repart de zéro
+SNAPSHOT_VERSION = 1
+
+# Clés du state_map sauvegardées ("balances" est un alias de stats.positions)
+STATE_KEYS = (
+    "holder_count", "price", "price_tx_estimate", "trades", "stats", "series",
+    "price_history", "price_tx_history", "tx_count", "buyers", "sellers",
+)
+
+_live = {}  # mint -> (state_map, start_time), monitors en cours
+_restored = {}  # mint -> (state, start_time), en attente de leur monitor
+
+
+def track(mint, state_map, start_time):
+    _live[mint] = (state_map, start_time)
+
+
+def untrack(mint):
+    _live.pop(mint, None)
+
+
+def restore_state(mint, state_map):
+    """Fill `state_map` from the loaded snapshot. Returns the original start time, or None."""
+    saved = _restored.pop(mint, None)
+    if saved is None:
+        return None
+    state, start_time = saved
+    state_map.update(state)
+    if "stats" in state:
+        state_map["balances"] = state["stats"].positions
+    return start_time
+
+
+def take_snapshot(dispatcher):
+    """Serialized state (bytes). Runs on the event loop: the state is consistent."""
+    state = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "cursor": dispatcher.cursor,
+        "projects": [dispatcher.project_definitions[mint] for mint in _live if mint in dispatcher.project_definitions],
+        "curve_reserves": dispatcher.curve_reserves,
+        "last_price_event": dispatcher.last_price_event,
+        "completed_curves": dispatcher.completed_curves,
+        "last_activity": dict(dispatcher.last_activity),
+        "seen_signatures": dispatcher.seen_signatures,
+        "alt_tables": dispatcher.alt_store.tables,
+        "tokens": {
+            mint: ({key: state_map[key] for key in STATE_KEYS if key in state_map}, start_time)
+            for mint, (state_map, start_time) in _live.items()
+        },
+    }
+    return pickle.dumps(state, protocol=5)
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+async def snapshot_loop(dispatcher, path=SNAPSHOT_FILE, interval=SNAPSHOT_INTERVAL, debug=False):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            start = time.perf_counter()
+            data = take_snapshot(dispatcher)
+            blocked = time.perf_counter() - start
+            metrics.EVENT_LOOP_LAG.observe(blocked)  # Boucle bloquée pendant le dump
+            await asyncio.to_thread(write_file, path, data)  # Écriture hors de la boucle
+            if debug:
+                print(f"💾 Snapshot: {len(_live)} tokens, {len(data) / 1024:.0f} KiB "
+                      f"in {(time.perf_counter() - start) * 1000:.1f} ms ({blocked * 1000:.1f} ms on the loop)")
+        except Exception as e:
+            print(f"[⚠️] Snapshot failed: {e}")
+
+
+async def restore(dispatcher, path=SNAPSHOT_FILE, max_age=MAX_SNAPSHOT_AGE):
+    """Reload `path` into `dispatcher`. Returns the cursor to catch up from, or None.
+    `path` is unpickled: it must be a trusted file (see the header)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except Exception as e:
+        print(f"[⚠️] Unreadable snapshot {path}: {e}")
+        return None
+    if state.get("version") != SNAPSHOT_VERSION:
+        return None
+    age = time.time() - state["saved_at"]
+    if age > max_age:
+        print(f"⏭️ Snapshot too old ({age:.0f}s), starting fresh")
+        return None
+
+    dispatcher.seen_signatures = state["seen_signatures"]
+    dispatcher.alt_store.tables.update(state["alt_tables"])
+    dispatcher.cursor = state["cursor"]
+    _restored.update(state["tokens"])
+    for project in state["projects"]:
+        mint = project["mint"]
+        await dispatcher.register_project(project)
+        if mint in state["curve_reserves"]:
+            dispatcher.curve_reserves[mint] = state["curve_reserves"][mint]
+        if mint in state["last_price_event"]:
+            dispatcher.last_price_event[mint] = state["last_price_event"][mint]
+        if mint in state["completed_curves"]:
+            dispatcher.completed_curves.add(mint)
+        if mint in state["last_activity"]:
+            dispatcher.last_activity[mint] = state["last_activity"][mint]
+
+    print(f"♻️ Restored {len(state['projects'])} tokens from snapshot ({age:.1f}s old)")
+    return state["cursor"]
+
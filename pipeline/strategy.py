@@ -0,0 +1,159 @@
+# strategy.py
+#
+# Declarative strategies, compiled once:
+#   - create-time filters (name regex, creator allow/deny, symbol length)
+#     -> precompiled regexes and frozenset lookups, checked by the watchers;
+#   - live-time rules (holders by T, price increase, momentum window)
+#     -> thresholds of the rule scheduler and the momentum screener.
+# Spec format (JSON, YAML if PyYAML is installed, or a Python dict):
+#   {"name": "pepe", "create": {"name_regex": "pepe|frog", "creator_deny": [...]},
+#    "live": {"min_holders": 15, "holder_check_sec": 20, "momentum": {"min_points": 5}}}
+# "price_min_increase": null disables the price rule, "momentum": null the
+# momentum detection. A token runs the live rules of every strategy it matched.
+import json
+import re
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_LIVE = {
+    "min_holders": 15,
+    "holder_check_sec": 20,
+    "price_min_increase": 0.20,
+    "price_check_sec": 10,
+    "no_holders_sec": 10,
+}
+DEFAULT_MOMENTUM = {"min_points": 5, "max_age_sec": 7, "min_volume": 0.0, "min_buyers": 0}
+
+
+def _token_text(token_data):
+    return token_data.get("name", "") + token_data.get("symbol", "")
+
+
+def _compile_create(spec):
+    """Create-time filters -> list of predicates(token_data), cheapest first."""
+    predicates = []
+    for key in spec:
+        if key not in ("name_regex", "name_contains", "creator_allow", "creator_deny",
+                       "creator_address", "symbol_len"):
+            raise ValueError(f"Unknown create filter: {key}")
+
+    allow = set(spec.get("creator_allow", ()))
+    if "creator_address" in spec:  # ancien format de filtres
+        allow.add(spec["creator_address"])
+    if allow:
+        allow = frozenset(allow)
+        predicates.append(lambda t: t.get("user", "") in allow)
+
+    if spec.get("creator_deny"):
+        deny = frozenset(spec["creator_deny"])
+        predicates.append(lambda t: t.get("user", "") not in deny)
+
+    if "symbol_len" in spec:
+        low, high = spec["symbol_len"]
+        predicates.append(lambda t: low <= len(t.get("symbol", "")) <= high)
+
+    if "name_contains" in spec:
+        contains = re.compile(re.escape(spec["name_contains"]), re.IGNORECASE)
+        predicates.append(lambda t: contains.search(_token_text(t)) is not None)
+
+    if spec.get("name_regex"):
+        regex = re.compile(spec["name_regex"], re.IGNORECASE)
+        predicates.append(lambda t: regex.search(_token_text(t)) is not None)
+
+    return predicates
+
+
+def _compile_live(spec):
+    thresholds = {**DEFAULT_LIVE, **{k: v for k, v in spec.items() if k != "momentum"}}
+    unknown = set(thresholds) - set(DEFAULT_LIVE)
+    if unknown:
+        raise ValueError(f"Unknown live rule(s): {', '.join(sorted(unknown))}")
+
+    momentum = spec.get("momentum", {})
+    if momentum is None or momentum is False:
+        thresholds["momentum"] = None  # Pas de détection de momentum
+    elif not isinstance(momentum, dict):
+        raise ValueError(f"momentum must be an object or null, not {momentum!r}")
+    else:
+        unknown = set(momentum) - set(DEFAULT_MOMENTUM)
+        if unknown:
+            raise ValueError(f"Unknown momentum setting(s): {', '.join(sorted(unknown))}")
+        thresholds["momentum"] = {**DEFAULT_MOMENTUM, **momentum}
+    return thresholds
+
+
+class Strategy:
+    __slots__ = ("name", "predicates", "thresholds")
+
+    def __init__(self, name, predicates, thresholds):
+        self.name = name
+        self.predicates = predicates
+        self.thresholds = thresholds  # dict for monitor_project / RuleScheduler
+
+    def accepts(self, token_data) -> bool:
+        for predicate in self.predicates:
+            if not predicate(token_data):
+                return False
+        return True
+
+
+def compile_strategy(spec) -> Strategy:
+    return Strategy(
+        spec.get("name", "default"),
+        _compile_create(spec.get("create", {})),
+        _compile_live(spec.get("live", {})),
+    )
+
+
+class StrategySet:
+    """Several strategies on one ingest stream, in priority order."""
+
+    def __init__(self, strategies):
+        self.strategies = list(strategies)
+        self.by_name = {s.name: s for s in self.strategies}
+        if len(self.by_name) != len(self.strategies):
+            raise ValueError("Strategy names must be unique")
+
+    def __len__(self):
+        return len(self.strategies)
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def match(self, token_data) -> list:
+        """Strategies accepting this token (first = highest priority)."""
+        return [s for s in self.strategies if s.accepts(token_data)]
+
+    def for_project(self, project) -> list:
+        """Strategies matched by the watcher for `project` (project["strategies"])."""
+        return [self.by_name[name] for name in project.get("strategies", ()) if name in self.by_name]
+
+
+def compile_filters(filters) -> StrategySet:
+    """Accept a StrategySet, a Strategy, a spec list or the old {"name_contains", "creator_address"} dict."""
+    if isinstance(filters, StrategySet):
+        return filters
+    if isinstance(filters, Strategy):
+        return StrategySet([filters])
+    if isinstance(filters, list):
+        return StrategySet(compile_strategy(spec) for spec in filters)
+    filters = filters or {}
+    if "create" in filters or "live" in filters:
+        return StrategySet([compile_strategy(filters)])
+    return StrategySet([compile_strategy({"create": filters})])
+
+
+def load_strategies(path) -> StrategySet:
+    with open(path, 'r') as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ImportError("PyYAML is required to load YAML strategies")
+            specs = yaml.safe_load(f)
+        else:
+            specs = json.load(f)
+    if isinstance(specs, dict):
+        specs = specs.get("strategies", [specs])
+    return compile_filters(specs)
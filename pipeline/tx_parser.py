@@ -0,0 +1,236 @@
+# tx_parser.py
+#
+# Lightweight parser for the Solana transaction wire format.
+# Walks the compact-u16 message layout over a memoryview and only keeps the
+# instructions that target the Pump program. The full solders
+# VersionedTransaction is only built on demand (to_versioned()).
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+from config import PUMP_PROGRAM
+
+PUMP_PROGRAM_BYTES = bytes(PUMP_PROGRAM)
+
+SIGNATURE_LEN = 64
+PUBKEY_LEN = 32
+BLOCKHASH_LEN = 32
+VERSION_PREFIX_MASK = 0x80
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_VALUES = {char: i for i, char in enumerate(B58_ALPHABET)}
+
+
+def read_compact_u16(buf, offset):
+    """Decode a compact-u16 (1 to 3 bytes). Returns (value, new_offset)."""
+    value = 0
+    for shift in (0, 7, 14):
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+    raise ValueError("Invalid compact-u16 encoding")
+
+
+def b58decode(text) -> bytes:
+    """Base58 -> bytes (inner instruction data of the block payload)."""
+    value = 0
+    for char in text:
+        value = value * 58 + _B58_VALUES[char]
+    zeros = len(text) - len(text.lstrip("1"))
+    return b"\0" * zeros + value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+
+def first_signature(raw) -> bytes:
+    """Raw 64-byte first signature (transaction id) without parsing the message."""
+    num_sigs, offset = read_compact_u16(raw, 0)
+    if num_sigs == 0:
+        raise ValueError("Transaction without signature")
+    return bytes(raw[offset:offset + SIGNATURE_LEN])
+
+
+def find_program_index(raw, keys_offset, num_keys, program=PUMP_PROGRAM_BYTES):
+    """Index of `program` in the static account keys, or -1."""
+    keys_end = keys_offset + num_keys * PUBKEY_LEN
+    pos = raw.find(program, keys_offset, keys_end)
+    while pos != -1:
+        delta = pos - keys_offset
+        if delta % PUBKEY_LEN == 0:
+            return delta // PUBKEY_LEN
+        # Match straddling two keys, keep searching
+        pos = raw.find(program, pos + 1, keys_end)
+    return -1
+
+
+def instruction_kinds(raw, kinds, program=PUMP_PROGRAM_BYTES, inner=None, inner_kind=0, max_inner_data=None):
+    """
+    Prefilter: OR of the `kinds` flags ({8-byte discriminator: bit}) of the
+    `program` instructions, in one pass over the instruction headers.
+    Discriminator bytes elsewhere (signatures, keys, other programs' data)
+    are never looked at. 0 means nothing to decode.
+    With `inner`, CPI calls to `program` whose base58 data is not longer than
+    `max_inner_data` add `inner_kind` (their data is not decoded here).
+    """
+    num_sigs, offset = read_compact_u16(raw, 0)
+    offset += num_sigs * SIGNATURE_LEN
+    if raw[offset] & VERSION_PREFIX_MASK:
+        offset += 1
+    num_keys, offset = read_compact_u16(raw, offset + 3)
+    keys_offset = offset
+    offset += num_keys * PUBKEY_LEN + BLOCKHASH_LEN
+
+    program_index = find_program_index(raw, keys_offset, num_keys, program)
+    if program_index == -1:
+        return 0
+
+    found = 0
+    num_ix, offset = read_compact_u16(raw, offset)
+    for _ in range(num_ix):
+        program_id_index = raw[offset]
+        num_accounts, offset = read_compact_u16(raw, offset + 1)
+        data_len, offset = read_compact_u16(raw, offset + num_accounts)
+        if program_id_index == program_index:
+            found |= kinds.get(raw[offset:offset + 8], 0)
+        offset += data_len
+
+    if inner:
+        for ix in inner:
+            if ix.program_id_index == program_index and (max_inner_data is None or len(ix.data) <= max_inner_data):
+                return found | inner_kind
+    return found
+
+
+class RawInstruction:
+    __slots__ = ("program_id_index", "accounts", "data", "discriminator")
+
+    def __init__(self, program_id_index, accounts, data):
+        self.program_id_index = program_id_index
+        self.accounts = accounts  # memoryview of u8 account indexes
+        self.data = data  # memoryview of instruction data
+        self.discriminator = bytes(data[:8])
+
+
+class RawTransaction:
+    __slots__ = (
+        "raw", "version", "signature", "keys_offset", "num_keys",
+        "instructions", "lookups_offset", "loaded", "_versioned",
+    )
+
+    def __init__(self, raw, version, signature, keys_offset, num_keys, instructions, lookups_offset=None):
+        self.raw = raw
+        self.version = version  # None for legacy messages
+        self.signature = signature  # raw 64 bytes
+        self.keys_offset = keys_offset
+        self.num_keys = num_keys
+        self.instructions = instructions  # Pump instructions only
+        self.lookups_offset = lookups_offset  # v0 only: start of the address table lookups
+        self.loaded = None  # keys loaded from lookup tables (writable then readonly), once resolved
+        self._versioned = None
+
+    def key(self, index) -> bytes:
+        """Raw 32 bytes of the static account key at `index`."""
+        if index >= self.num_keys:
+            raise IndexError(f"account index {index} out of static keys ({self.num_keys})")
+        start = self.keys_offset + index * PUBKEY_LEN
+        return self.raw[start:start + PUBKEY_LEN]
+
+    def address_table_lookups(self):
+        """[(table key, writable indexes, readonly indexes)] of a v0 message, raw bytes."""
+        if self.lookups_offset is None:
+            return []
+        view = memoryview(self.raw)
+        lookups = []
+        count, offset = read_compact_u16(view, self.lookups_offset)
+        for _ in range(count):
+            table = bytes(view[offset:offset + PUBKEY_LEN])
+            num_writable, offset = read_compact_u16(view, offset + PUBKEY_LEN)
+            writable = bytes(view[offset:offset + num_writable])
+            num_readonly, offset = read_compact_u16(view, offset + num_writable)
+            readonly = bytes(view[offset:offset + num_readonly])
+            offset += num_readonly
+            lookups.append((table, writable, readonly))
+        return lookups
+
+    def pubkey(self, index) -> Pubkey:
+        return Pubkey.from_bytes(self.key(index))
+
+    def account(self, ix, position):
+        """Raw key of the `position`-th account of `ix`, or None if unavailable."""
+        if position >= len(ix.accounts):
+            return None
+        index = ix.accounts[position]
+        if index >= self.num_keys:
+            # Clé chargée depuis une address lookup table (résolue par alt_store.py)
+            if self.loaded is None or index - self.num_keys >= len(self.loaded):
+                return None
+            return self.loaded[index - self.num_keys]
+        return self.key(index)
+
+    def to_versioned(self) -> VersionedTransaction:
+        if self._versioned is None:
+            self._versioned = VersionedTransaction.from_bytes(bytes(self.raw))
+        return self._versioned
+
+
+def parse_pump_transaction(raw, program=PUMP_PROGRAM_BYTES, inner=None, max_inner_data=None):
+    """
+    Parse a serialized transaction and keep only `program` instructions.
+    `inner` (meta inner instructions, see json_codec.InnerInstruction) adds
+    the CPI calls to `program`, after the top-level ones; their base58 data is
+    only decoded when not longer than `max_inner_data` characters.
+    Returns None when the program is not among the static keys or has no
+    instruction in the message.
+    """
+    view = memoryview(raw)
+
+    num_sigs, offset = read_compact_u16(view, 0)
+    if num_sigs == 0:
+        raise ValueError("Transaction without signature")
+    signature = bytes(view[offset:offset + SIGNATURE_LEN])
+    offset += num_sigs * SIGNATURE_LEN
+
+    version = None
+    if view[offset] & VERSION_PREFIX_MASK:
+        version = view[offset] & 0x7F
+        offset += 1
+    offset += 3  # message header
+
+    num_keys, offset = read_compact_u16(view, offset)
+    keys_offset = offset
+    offset += num_keys * PUBKEY_LEN + BLOCKHASH_LEN
+    if offset > len(view):
+        raise ValueError("Truncated transaction")
+
+    program_index = find_program_index(raw, keys_offset, num_keys, program)
+    if program_index == -1:
+        return None
+
+    instructions = []
+    num_ix, offset = read_compact_u16(view, offset)
+    for _ in range(num_ix):
+        program_id_index = view[offset]
+        num_accounts, offset = read_compact_u16(view, offset + 1)
+        accounts_start = offset
+        offset += num_accounts
+        data_len, offset = read_compact_u16(view, offset)
+        data_start = offset
+        offset += data_len
+        if program_id_index == program_index:
+            instructions.append(RawInstruction(
+                program_id_index,
+                view[accounts_start:accounts_start + num_accounts],
+                view[data_start:offset],
+            ))
+
+    if offset > len(view):
+        raise ValueError("Truncated transaction")
+
+    if inner:
+        for ix in inner:
+            if ix.program_id_index == program_index and (max_inner_data is None or len(ix.data) <= max_inner_data):
+                instructions.append(RawInstruction(program_index, bytes(ix.accounts), b58decode(ix.data)))
+
+    if not instructions:
+        return None
+
+    lookups_offset = offset if version == 0 and offset < len(view) else None
+    return RawTransaction(raw, version, signature, keys_offset, num_keys, instructions, lookups_offset)
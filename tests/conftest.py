@@ -0,0 +1,5 @@
+import os
+
+# Endpoints lus à l'import des modules RPC : jamais contactés par les tests
+os.environ.setdefault("RPC_HTTP_ENDPOINT", "http://127.0.0.1:1")
+os.environ.setdefault("SOLANA_NODE_WSS_ENDPOINT", "ws://127.0.0.1:1")
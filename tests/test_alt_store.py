@@ -0,0 +1,43 @@
+import os
+import struct
+
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import MessageAddressTableLookup, MessageHeader, MessageV0
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from benchmarks.synthetic import PumpTxFactory, random_key
+from config import PUMP_PROGRAM
+from pipeline.alt_store import ALT_UNRESOLVED, MAX_PARKED, AltStore
+from pipeline.block_decoder import BUY_DISCRIMINATOR, LookupRecord, decode_transaction, load_account_indexes
+
+
+def test_parked_transactions_are_bounded():
+    store = AltStore()
+    lookups = [(b"\1" * 32, b"", b"\0")]
+    unresolved = ALT_UNRESOLVED.value
+    for i in range(MAX_PARKED + 3):
+        store.park(i, lookups)
+    assert len(store.parked) == MAX_PARKED and store.parked[0][0] == 3
+    assert ALT_UNRESOLVED.value == unresolved + 3
+
+
+def test_trader_loaded_from_lookup_table_is_parked():
+    names = PumpTxFactory().accounts["buy"]
+    mint, user, table = random_key(), random_key(), random_key()
+    others = {name: random_key() for name in names if name not in ("mint", "user", "program")}
+    static = [mint] + list(others.values()) + [PUMP_PROGRAM]  # le trader vient de la lookup table
+    index = {key: i for i, key in enumerate(static)}
+    index[user] = len(static)
+    accounts = bytes(
+        index[PUMP_PROGRAM] if name == "program" else index[{"mint": mint, "user": user}.get(name) or others[name]]
+        for name in names
+    )
+    ix = CompiledInstruction(index[PUMP_PROGRAM], BUY_DISCRIMINATOR + struct.pack("<QQ", 1000, 10**7), accounts)
+    message = MessageV0(MessageHeader(1, 0, 1), static, Hash.default(), [ix],
+                        [MessageAddressTableLookup(table, bytes(), bytes([0]))])
+    raw = bytes(VersionedTransaction.populate(message, [Signature.from_bytes(os.urandom(64))]))
+
+    _, records = decode_transaction(raw, load_account_indexes("mint"), load_account_indexes("user"))
+    assert [type(record) for record in records] == [LookupRecord]
@@ -0,0 +1,78 @@
+import asyncio
+
+from pipeline import backfill, clock
+from pipeline.json_codec import BlockTransaction
+
+
+class RecordingDispatcher:
+    watch_creations = False
+
+    def __init__(self):
+        self.monitor_queues = {}
+        self.cursor = None
+        self.seen = []  # (raw tx, virtual time)
+
+    async def dispatch_transaction(self, raw_tx, log_messages=None, *args):
+        self.seen.append((raw_tx, clock.now()))
+
+
+def fake_rpc(monkeypatch, tips, blocks):
+    """get_slot returns `tips` in turn, get_block reads `blocks` (slot -> (block time, raw txs))."""
+    fetched = []
+    tips = iter(tips)
+
+    async def get_slot(session):
+        return next(tips)
+
+    async def get_block(session, slot):
+        fetched.append(slot)
+        if slot not in blocks:
+            return None  # slot sauté
+        block_time, raws = blocks[slot]
+        return block_time, [BlockTransaction(raw) for raw in raws]
+
+    monkeypatch.setattr(backfill, "get_slot", get_slot)
+    monkeypatch.setattr(backfill, "get_block", get_block)
+    return fetched
+
+
+def test_missed_slots_dispatched_in_order_until_the_tip(monkeypatch):
+    # Le tip avance pendant le rattrapage : deuxième passe jusqu'au nouveau tip
+    blocks = {101: (2000, ["a"]), 102: (2001, ["b", "c"]), 105: (2003, ["d"]), 107: (2004, ["e"])}
+    fetched = fake_rpc(monkeypatch, [105, 107, 107], blocks)
+    dispatcher = RecordingDispatcher()
+
+    asyncio.run(backfill.catch_up(dispatcher, 100, session=object()))
+
+    assert sorted(fetched) == list(range(101, 108))
+    assert dispatcher.seen == [("a", 2000), ("b", 2001), ("c", 2001), ("d", 2003), ("e", 2004)]
+    assert dispatcher.cursor == 107
+    assert clock._clock is None  # horloge murale restaurée
+
+
+def test_gap_larger_than_the_limit_keeps_the_last_slots(monkeypatch):
+    monkeypatch.setattr(backfill, "MAX_BACKFILL_SLOTS", 3)
+    fetched = fake_rpc(monkeypatch, [150, 150], {})
+    dispatcher = RecordingDispatcher()
+
+    asyncio.run(backfill.catch_up(dispatcher, 100, session=object()))
+    assert sorted(fetched) == [148, 149, 150]
+    assert dispatcher.cursor == 150
+
+
+def test_rpc_failure_stops_at_the_last_slot_dispatched(monkeypatch):
+    fake_rpc(monkeypatch, [120], {101: (2000, ["a"])})
+
+    async def get_block(session, slot):
+        if slot > 101:
+            raise ValueError("boom")
+        return 2000, [BlockTransaction("a")]
+
+    monkeypatch.setattr(backfill, "get_block", get_block)
+    monkeypatch.setattr(backfill, "FETCH_CONCURRENCY", 1)
+    dispatcher = RecordingDispatcher()
+
+    asyncio.run(backfill.catch_up(dispatcher, 100, session=object()))
+    assert dispatcher.seen == [("a", 2000)]
+    assert dispatcher.cursor == 101
+    assert clock._clock is None
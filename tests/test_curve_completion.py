@@ -0,0 +1,86 @@
+import asyncio
+import base64
+import os
+
+from solders.hash import Hash
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from pipeline.block_decoder import PUMP_PROGRAM_ID, CurveRecord, decode_transaction, get_account_indexes
+from pipeline.dispatcher import ProjectDispatcher
+from pipeline.event_decoder import event_discriminator, get_event_layouts
+from pipeline.B_projects_monitoring import bonding_curve_fetcher
+from pipeline.B_projects_monitoring.monirot_v2 import monitor_project
+
+CURVE = "11111111111111111111111111111111"
+
+
+def new_project(name):
+    return {"mint": str(Pubkey.from_bytes(os.urandom(32))), "name": name, "bondingCurve": CURVE}
+
+
+def test_complete_event_logged_by_pump():
+    mint = os.urandom(32)
+    layout = get_event_layouts()[event_discriminator("CompleteEvent")]
+    data = layout.discriminator + layout.struct.pack(bytes(32), mint, bytes(32), 0)
+    logs = [f"Program {PUMP_PROGRAM_ID} invoke [1]", "Program data: " + base64.b64encode(data).decode(),
+            f"Program {PUMP_PROGRAM_ID} success"]
+    signature = Signature.from_bytes(os.urandom(64))
+    raw = bytes(VersionedTransaction.populate(  # pas d'instruction Pump, seulement l'event
+        Message.new_with_compiled_instructions(1, 0, 0, [Pubkey.from_bytes(os.urandom(32))], Hash.default(), []),
+        [signature],
+    ))
+    mint_indexes, user_indexes = get_account_indexes()
+
+    _, records = decode_transaction(raw, mint_indexes, user_indexes, logs)
+    assert records == [CurveRecord(bytes(signature), mint, 0, 0, True)]
+
+
+def test_completion_stops_the_monitor_once():
+    async def scenario():
+        dispatcher = ProjectDispatcher()
+        project = new_project("migrating")
+        mint = project["mint"]
+        await dispatcher.register_project(project)
+        queue = dispatcher.monitor_queues[mint]
+
+        record = CurveRecord(os.urandom(64), bytes(Pubkey.from_string(mint)), 0, 0, True)
+        await dispatcher.dispatch_records(record.signature, [record])
+        await dispatcher.update_curve(mint, 30_000_000_000, 1_000_000_000_000_000, True)  # fetcher, ensuite
+        assert mint in dispatcher.completed_curves
+        assert queue.qsize() == 1  # un seul événement terminal, pas de price_update
+
+        monitor = asyncio.create_task(monitor_project(project, dispatcher))
+        await asyncio.wait_for(monitor, 1)
+        assert mint not in dispatcher.monitored_projects  # le monitor s'est désinscrit
+
+    asyncio.run(scenario())
+
+
+def test_fetcher_skips_completed_curves(monkeypatch):
+    requested = []
+
+    async def get_multiple_accounts(session, pubkeys):
+        requested.extend(pubkeys)
+        return [None] * len(pubkeys)
+
+    monkeypatch.setattr(bonding_curve_fetcher, "get_rpc_session", lambda: None)
+    monkeypatch.setattr(bonding_curve_fetcher, "get_multiple_accounts", get_multiple_accounts)
+
+    async def scenario():
+        dispatcher = ProjectDispatcher()
+        live, migrated = new_project("live"), dict(new_project("migrated"), bondingCurve="curve-migrated")
+        for project in (live, migrated):
+            await dispatcher.register_project(project)
+            dispatcher.monitor_queues[project["mint"]]  # queue du monitor
+            dispatcher.record_activity(project["mint"])
+        dispatcher.completed_curves.add(migrated["mint"])
+
+        task = asyncio.create_task(bonding_curve_fetcher.bonding_curve_fetcher(dispatcher))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert requested == [CURVE]
@@ -0,0 +1,35 @@
+import asyncio
+
+import websockets
+
+from pipeline.dispatcher import ProjectDispatcher
+from pipeline.B_projects_monitoring.curve_subscriber import CurveSubscriptionManager
+
+MINT = "So11111111111111111111111111111111111111112"
+CURVE = "11111111111111111111111111111111"
+
+
+class ClosedWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+        raise websockets.ConnectionClosed(None, None)
+
+
+def test_send_error_leaves_mint_pending_for_resubscribe():
+    async def scenario():
+        dispatcher = ProjectDispatcher()
+        manager = CurveSubscriptionManager(dispatcher)
+        manager.ws = ClosedWebSocket()
+
+        await dispatcher.register_project({"mint": MINT, "name": "closed", "bondingCurve": CURVE})
+        assert MINT in dispatcher.monitored_projects  # register_project n'a pas levé
+        assert manager.curves[MINT] == CURVE and len(manager.ws.sent) == 1
+
+        manager.subscription_by_mint[MINT] = 7
+        await dispatcher.unregister_project(MINT)
+        assert MINT not in manager.curves
+
+    asyncio.run(scenario())
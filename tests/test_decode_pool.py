@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import Message
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from benchmarks.synthetic import PumpTxFactory, block_frame, random_key
+from pipeline.block_decoder import PREFILTER_PASSED, PREFILTER_REJECTED, decode_block_frame
+from pipeline.decode_pool import route_decoded_blocks
+from pipeline.dispatcher import TX_FILTERED, TX_PARSED
+
+
+def other_transaction():
+    keys = [random_key() for _ in range(3)]
+    message = Message.new_with_compiled_instructions(1, 0, 1, keys, Hash.default(),
+                                                     [CompiledInstruction(2, os.urandom(20), bytes([0, 1]))])
+    return bytes(VersionedTransaction.populate(message, [Signature.from_bytes(os.urandom(64))]))
+
+
+class RoutingDispatcher:
+    def __init__(self):
+        self.routed = []
+        self.cursor = None
+
+    async def dispatch_records(self, signature, records):
+        self.routed.append((signature, records))
+
+
+def test_worker_counts_are_added_to_the_parent_counters():
+    factory = PumpTxFactory()
+    trades = [factory.trade(random_key(), random_key()) for _ in range(2)]
+    frame = block_frame(trades + [(other_transaction(), [])], slot=42)
+
+    # Ce que renvoie un worker du pool : ses propres compteurs ne sont jamais scrapés
+    slot, decoded, counts = decode_block_frame(frame)
+    assert slot == 42 and len(decoded) == 2
+    assert counts == {"parsed": 2, "filtered": 1, "prefilter_passed": 2, "prefilter_rejected": 1}
+
+    async def scenario():
+        dispatcher = RoutingDispatcher()
+        pending = asyncio.Queue()
+        future = asyncio.get_running_loop().create_future()
+        future.set_result((slot, decoded, counts))
+        pending.put_nowait(future)
+        task = asyncio.create_task(route_decoded_blocks(dispatcher, pending))
+        while not pending.empty() or len(dispatcher.routed) < 2:
+            await asyncio.sleep(0)
+        task.cancel()
+        return dispatcher.routed, dispatcher.cursor
+
+    counters = (TX_PARSED, TX_FILTERED, PREFILTER_PASSED, PREFILTER_REJECTED)
+    before = [counter.value for counter in counters]
+    routed, cursor = asyncio.run(scenario())
+    assert cursor == 42  # slot du dernier bloc routé
+    assert [signature for signature, _ in routed] == [signature for signature, _ in decoded]
+    assert [counter.value - value for counter, value in zip(counters, before)] == [2, 1, 2, 1]
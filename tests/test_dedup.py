@@ -0,0 +1,37 @@
+from pipeline.dedup import RecentSet
+
+
+def test_duplicate_rejected_and_membership():
+    seen = RecentSet(3)
+    assert seen.add("a") and not seen.add("a")
+    assert "a" in seen and "b" not in seen
+    assert len(seen) == 1
+
+
+def test_rotation_keeps_at_least_the_last_capacity_keys():
+    seen = RecentSet(3)
+    for key in "abc":
+        seen.add(key)
+    assert seen.current == {"a", "b", "c"} and not seen.previous
+
+    seen.add("d")  # current plein : il devient previous
+    assert seen.previous == {"a", "b", "c"} and seen.current == {"d"}
+    assert all(key in seen for key in "abcd")
+    assert not seen.add("b")  # encore connue dans previous
+
+    for key in "ef":
+        seen.add(key)
+    seen.add("g")  # deuxième rotation : a, b, c sont oubliées d'un coup
+    assert seen.previous == {"d", "e", "f"} and seen.current == {"g"}
+    assert not any(key in seen for key in "abc")
+    assert all(key in seen for key in "defg")
+    assert len(seen) == 4
+    assert seen.add("a")  # de nouveau acceptée
+
+
+def test_bounded_to_twice_the_capacity():
+    seen = RecentSet(100)
+    for i in range(10_000):
+        seen.add(i)
+        assert len(seen) <= 200
+    assert all(i in seen for i in range(9_900, 10_000))
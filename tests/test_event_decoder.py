@@ -0,0 +1,69 @@
+import base64
+import os
+
+from solders.hash import Hash
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from pipeline.block_decoder import PUMP_PROGRAM_ID, CurveRecord, decode_transaction, get_account_indexes
+from pipeline.event_decoder import event_discriminator, get_event_layouts
+
+ROUTER = "JUP6LkbZbjS1jKKwapdHNy74zcZ3tQUh5tr2SmQFMYCE"
+SIGNATURE = os.urandom(64)
+# Transaction sans instruction Pump : seuls les logs portent les events
+RAW_TX = bytes(VersionedTransaction.populate(
+    Message.new_with_compiled_instructions(1, 0, 0, [Pubkey.from_bytes(os.urandom(32))], Hash.default(), []),
+    [Signature.from_bytes(SIGNATURE)],
+))
+
+
+def trade_event(mint, sol_reserves, token_reserves):
+    layout = get_event_layouts()[event_discriminator("TradeEvent")]
+    data = layout.struct.pack(mint, 1, 2, True, bytes(32), 0, sol_reserves, token_reserves)
+    return "Program data: " + base64.b64encode(layout.discriminator + data).decode()
+
+
+def invoke(program, depth):
+    return f"Program {program} invoke [{depth}]"
+
+
+def curve_records(log_messages):
+    mint_indexes, user_indexes = get_account_indexes()
+    decoded = decode_transaction(RAW_TX, mint_indexes, user_indexes, log_messages)
+    return [] if decoded is None else decoded[1]
+
+
+def test_event_logged_by_pump_through_cpi():
+    mint = os.urandom(32)
+    logs = [
+        invoke(ROUTER, 1),
+        "Program log: Instruction: Route",
+        invoke(PUMP_PROGRAM_ID, 2),
+        "Program log: Instruction: Buy",
+        trade_event(mint, 40_000_000_000, 900_000_000_000_000),
+        f"Program {PUMP_PROGRAM_ID} consumed 30000 of 180000 compute units",
+        f"Program {PUMP_PROGRAM_ID} success",
+        f"Program {ROUTER} success",
+    ]
+    assert curve_records(logs) == [CurveRecord(SIGNATURE, mint, 40_000_000_000, 900_000_000_000_000)]
+
+
+def test_fake_event_from_another_program_is_ignored():
+    fake = trade_event(os.urandom(32), 1, 1)
+    logs = [
+        invoke(ROUTER, 1),
+        "Program log: invoke [2]",  # pas une ligne d'appel
+        fake,  # le router logue les mêmes octets qu'un TradeEvent
+        invoke(PUMP_PROGRAM_ID, 2),
+        "Program log: Instruction: Sell",
+        f"Program {PUMP_PROGRAM_ID} success",
+        fake,  # de retour dans le router
+        f"Program {ROUTER} success",
+        invoke(ROUTER, 1),
+        fake,
+        f"Program {ROUTER} failed: custom program error: 0x1",
+        fake,  # hors de tout appel
+    ]
+    assert curve_records(logs) == []
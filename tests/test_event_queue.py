@@ -0,0 +1,83 @@
+import asyncio
+
+from pipeline.block_decoder import BUY_DISCRIMINATOR, TradeRecord
+from pipeline.dispatcher import ProjectDispatcher
+from pipeline.event_queue import PAUSE, BoundedEventQueue, QueueBudget
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+def trade(i):
+    return TradeRecord(bytes([i]) * 64, b"\0" * 32, BUY_DISCRIMINATOR, 1, 1, None)
+
+
+async def _fill_and_block(queue):
+    for i in range(queue.capacity):
+        await queue.put(trade(i))
+    putter = asyncio.create_task(queue.put(trade(99)))
+    await asyncio.sleep(0)
+    assert not putter.done()  # PAUSE : file pleine, le dispatcher attend
+    return putter
+
+
+def test_pause_putter_released_when_monitor_unregistered():
+    async def scenario():
+        dispatcher = ProjectDispatcher(queue_size=2, queue_policy=PAUSE)
+        await dispatcher.register_project({"mint": MINT, "name": "paused"})
+        queue = dispatcher.monitor_queues[MINT]
+        putter = await _fill_and_block(queue)
+
+        await dispatcher.unregister_project(MINT)  # monitor arrêté sans vider sa file
+        await asyncio.wait_for(putter, timeout=1)
+        assert queue.closed and queue.dropped == 1
+        assert dispatcher.queue_budget.used == 0
+
+    asyncio.run(scenario())
+
+
+def test_pause_putter_released_by_stop_sentinel():
+    async def scenario():
+        queue = BoundedEventQueue(2, PAUSE)
+        putter = await _fill_and_block(queue)
+
+        queue.put_nowait(None)  # stop() du monitor
+        await asyncio.wait_for(putter, timeout=1)
+        assert [queue.get_nowait() for _ in range(queue.qsize())] == [trade(0), trade(1), None]
+
+    asyncio.run(scenario())
+
+
+def test_price_slot_delivered_after_the_trades_queued_before_it():
+    queue = BoundedEventQueue(10)
+    queue.put_nowait(trade(1))
+    queue.put_nowait(("price_update", 1.0))
+    queue.put_nowait(trade(2))
+    queue.put_nowait(("price_update", 2.0))  # écrase 1.0 : livré après trade(2)
+    queue.put_nowait(trade(3))
+    assert queue.qsize() == 4
+    assert [queue.get_nowait() for _ in range(4)] == [trade(1), trade(2), ("price_update", 2.0), trade(3)]
+
+
+def test_price_slot_keeps_its_place_when_older_trades_are_dropped():
+    queue = BoundedEventQueue(2)
+    queue.put_nowait(trade(1))
+    queue.put_nowait(trade(2))
+    queue.put_nowait(("price_update", 1.0))
+    queue.put_nowait(trade(3))  # capacité : trade(1) est jeté
+    assert [queue.get_nowait() for _ in range(3)] == [trade(2), ("price_update", 1.0), trade(3)]
+
+
+def test_exhausted_budget_sheds_from_the_deepest_queue():
+    budget = QueueBudget(4)
+    deep, shallow = BoundedEventQueue(10, budget=budget), BoundedEventQueue(10, budget=budget)
+    for i in range(3):
+        deep.put_nowait(trade(i))
+    shallow.put_nowait(trade(10))
+
+    shallow.put_nowait(trade(11))  # budget épuisé : le monitor en retard perd son plus ancien événement
+    assert (deep.dropped, shallow.dropped, budget.used) == (1, 0, 4)
+    assert [deep.get_nowait() for _ in range(2)] == [trade(1), trade(2)]
+    assert [shallow.get_nowait() for _ in range(2)] == [trade(10), trade(11)]
+
+    deep.detach()
+    assert budget.queues == {shallow}
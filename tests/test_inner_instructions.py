@@ -0,0 +1,93 @@
+import base64
+import json
+import os
+import struct
+
+import pytest
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from config import PUMP_PROGRAM
+from pipeline import json_codec
+from pipeline.block_decoder import BUY_DISCRIMINATOR, SELL_DISCRIMINATOR, TradeRecord, decode_block, get_account_indexes
+from pipeline.tx_parser import B58_ALPHABET, b58decode
+
+BUY_ACCOUNTS = ("global", "feeRecipient", "mint", "bondingCurve", "associatedBondingCurve", "associatedUser",
+                "user", "systemProgram", "tokenProgram", "rent", "eventAuthority", "program")
+
+
+def b58encode(data):
+    value = int.from_bytes(data, "big")
+    text = ""
+    while value:
+        value, digit = divmod(value, 58)
+        text = B58_ALPHABET[digit] + text
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + text
+
+
+def key():
+    return Pubkey.from_bytes(os.urandom(32))
+
+
+def routed_trades():
+    """Router transaction calling Pump buy then sell through CPI (Pump only in the keys)."""
+    user, mint, router = key(), key(), key()
+    named = {name: key() for name in BUY_ACCOUNTS}
+    named.update(user=user, mint=mint, program=PUMP_PROGRAM)
+    keys = [user] + [k for name, k in named.items() if name not in ("user", "program")] + [router, PUMP_PROGRAM]
+    index = {k: i for i, k in enumerate(keys)}
+    accounts = [index[named[name]] for name in BUY_ACCOUNTS]
+
+    # L'instruction du router porte aussi un discriminator : seules les CPI comptent
+    router_ix = CompiledInstruction(index[router], BUY_DISCRIMINATOR + bytes(16), bytes(accounts))
+    message = Message.new_with_compiled_instructions(1, 0, 3, keys, Hash.default(), [router_ix])
+    raw = bytes(VersionedTransaction.populate(message, [Signature.from_bytes(os.urandom(64))]))
+
+    inner = [
+        {"programIdIndex": index[PUMP_PROGRAM], "accounts": accounts,
+         "data": b58encode(BUY_DISCRIMINATOR + struct.pack("<QQ", 5_000_000, 10_000_000)), "stackHeight": 2},
+        {"programIdIndex": index[router], "accounts": [0], "data": b58encode(os.urandom(60)), "stackHeight": 2},
+        {"programIdIndex": index[PUMP_PROGRAM], "accounts": accounts,
+         "data": b58encode(SELL_DISCRIMINATOR + struct.pack("<QQ", 2_000_000, 3_000_000)), "stackHeight": 2},
+    ]
+    frame = json.dumps({"params": {"result": {"value": {"block": {"transactions": [{
+        "transaction": [base64.b64encode(raw).decode(), "base64"],
+        "meta": {"err": None, "logMessages": [], "innerInstructions": [
+            {"index": 0, "instructions": inner[:2]}, {"index": 0, "instructions": inner[2:]},
+        ]},
+    }]}}}}})
+    signature = raw[1:65]
+    expected = [
+        TradeRecord(signature, bytes(mint), BUY_DISCRIMINATOR, 5_000_000, 10_000_000, bytes(user)),
+        TradeRecord(signature, bytes(mint), SELL_DISCRIMINATOR, 2_000_000, 3_000_000, bytes(user)),
+    ]
+    return frame, expected
+
+
+def from_dict(frame):
+    return json_codec._block_transactions_from_dict(json.loads(frame))
+
+
+@pytest.mark.parametrize("decode", [json_codec.decode_block_transactions, from_dict], ids=[json_codec.BACKEND, "dict"])
+def test_cpi_trades_decoded_on_both_json_paths(decode):
+    frame, expected = routed_trades()
+    transactions = decode(frame)
+    assert len(transactions) == 1 and len(transactions[0].inner_instructions) == 3
+
+    mint_indexes, user_indexes = get_account_indexes()
+    [(signature, records)] = decode_block(transactions, mint_indexes, user_indexes)
+    assert signature == expected[0].signature
+    assert records == expected
+
+
+def test_b58decode_matches_solders():
+    for _ in range(50):
+        pubkey = key()
+        assert b58decode(str(pubkey)) == bytes(pubkey)
+    assert b58decode(str(Pubkey.default())) == bytes(32)  # zéros de tête : "1111..."
+    data = b"\0\0" + os.urandom(30)
+    assert b58decode(b58encode(data)) == data
@@ -0,0 +1,57 @@
+import importlib.util
+import json
+import sys
+
+import pytest
+
+from pipeline import json_codec
+
+BACKENDS = {"msgspec": (), "orjson": ("msgspec",), "json": ("msgspec", "orjson")}
+
+
+def load_codec(backend, monkeypatch):
+    """Fresh copy of json_codec with the faster libraries hidden."""
+    for name in BACKENDS[backend]:
+        monkeypatch.setitem(sys.modules, name, None)  # import -> ImportError
+    spec = importlib.util.spec_from_file_location(f"json_codec_{backend}", json_codec.__file__)
+    codec = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(codec)
+    return codec
+
+
+def block_frame(transactions, **extra):
+    return json.dumps({"jsonrpc": "2.0", "method": "blockNotification", "params": {"result": {
+        "context": {"slot": 7},
+        "value": {"slot": 7, "block": {"blockTime": 0, "transactions": transactions, **extra}},
+    }}})
+
+
+FRAMES = [
+    block_frame([
+        {"transaction": ["tx-a", "base64"], "meta": {"err": None, "fee": 5000, "preBalances": [1, 2]}},
+        {"transaction": ["tx-failed", "base64"], "meta": {"err": {"InstructionError": [0, "Custom"]}}},
+        {"transaction": ["tx-no-meta", "base64"], "meta": None},
+        {"transaction": ["tx-b", "base64"], "meta": {"err": None}, "version": 0},
+    ], rewards=[{"lamports": 1}]),
+    block_frame([]),
+]
+OTHER_MESSAGES = [
+    json.dumps({"jsonrpc": "2.0", "result": 5, "id": 1}),  # confirmation d'abonnement
+    json.dumps({"jsonrpc": "2.0", "method": "blockNotification", "params": {"result": {"value": {"slot": 8}}}}),
+]
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_backends_agree(backend, monkeypatch):
+    if backend != "json":
+        pytest.importorskip(backend)
+    codec = load_codec(backend, monkeypatch)
+    assert codec.BACKEND == backend
+
+    for frame in FRAMES:
+        for message in (frame, frame.encode()):
+            assert codec.decode_block_transactions(message) == codec._block_transactions_from_dict(json.loads(frame))
+    assert [tx.transaction for tx in codec.decode_block_transactions(FRAMES[0])] == ["tx-a", "tx-b"]
+    assert codec.decode_block_transactions(FRAMES[1]) == []
+    for message in OTHER_MESSAGES:
+        assert codec.decode_block_transactions(message) is None
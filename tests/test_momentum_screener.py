@@ -0,0 +1,24 @@
+from pipeline.B_projects_monitoring.momentum_screener import MomentumScreener
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+def test_price_history_does_not_count_for_buyers():
+    screener = MomentumScreener(min_points=5)
+    screener.add_token(MINT)
+    screener.set(MINT, "price", 100, 1.0)  # mise à jour de prix à t0, puis silence
+    screener.add(MINT, "buyers", 104, 1)  # un seul achat à t4 : buyers [0, 0, 0, 0, 1]
+    screener.add(MINT, "volume", 104, 0.5)
+
+    assert screener.screen(now=104) == []
+
+
+def test_matches_once_every_metric_has_min_points_seconds():
+    screener = MomentumScreener(min_points=3)
+    screener.add_token(MINT)
+    for i, sec in enumerate(range(100, 103)):
+        screener.set(MINT, "price", sec, 1.0 + i)
+        screener.add(MINT, "buyers", sec, 1 + i)
+        screener.add(MINT, "volume", sec, 0.5 * (1 + i))
+
+    assert screener.screen(now=102) == [(MINT, 2.0)]
@@ -0,0 +1,104 @@
+import os
+import random
+
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import Message, MessageAddressTableLookup, MessageHeader, MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from config import PUMP_PROGRAM
+from pipeline.block_decoder import (
+    BUY_DISCRIMINATOR,
+    CREATE_DISCRIMINATOR,
+    KIND_BUY,
+    KIND_CREATE,
+    KIND_SELL,
+    PUMP_KINDS,
+    SELL_DISCRIMINATOR,
+)
+from pipeline.tx_parser import instruction_kinds
+
+DISCRIMINATORS = (CREATE_DISCRIMINATOR, BUY_DISCRIMINATOR, SELL_DISCRIMINATOR)
+
+
+def key():
+    return Pubkey.from_bytes(os.urandom(32))
+
+
+def transaction(instructions, num_keys=6, pump_index=None, v0=False, lookups=0):
+    """instructions: [(program is Pump, data)]. Pump is the last key (or at pump_index)."""
+    keys = [key() for _ in range(num_keys)]
+    program = key()
+    keys.append(program)
+    if pump_index is not None:
+        keys.insert(pump_index, PUMP_PROGRAM)
+    else:
+        keys.append(PUMP_PROGRAM)
+    accounts = bytes(range(min(len(keys), 12)))
+    ixs = [
+        CompiledInstruction(keys.index(PUMP_PROGRAM if is_pump else program), data, accounts)
+        for is_pump, data in instructions
+    ]
+    if v0:
+        tables = [MessageAddressTableLookup(key(), bytes([0, 1]), bytes([2])) for _ in range(lookups)]
+        message = MessageV0(MessageHeader(1, 0, 2), keys, Hash.default(), ixs, tables)
+    else:
+        message = Message.new_with_compiled_instructions(1, 0, 2, keys, Hash.default(), ixs)
+    return bytes(VersionedTransaction.populate(message, [Signature.from_bytes(os.urandom(64))]))
+
+
+def kinds_from_solders(raw):
+    message = VersionedTransaction.from_bytes(raw).message
+    keys = message.account_keys
+    found = 0
+    for ix in message.instructions:
+        if keys[ix.program_id_index] == PUMP_PROGRAM:
+            found |= PUMP_KINDS.get(bytes(ix.data[:8]), 0)
+    return found
+
+
+def test_kinds_of_the_pump_instructions():
+    raw = transaction([(True, BUY_DISCRIMINATOR + bytes(16)), (True, SELL_DISCRIMINATOR + bytes(16))])
+    assert instruction_kinds(raw, PUMP_KINDS) == KIND_BUY | KIND_SELL
+    raw = transaction([(False, bytes(4)), (True, CREATE_DISCRIMINATOR + bytes(30))])
+    assert instruction_kinds(raw, PUMP_KINDS) == KIND_CREATE
+
+
+def test_discriminator_outside_pump_instructions_is_ignored():
+    # Router : Pump passé en compte, discriminator dans ses propres données
+    raw = transaction([(False, BUY_DISCRIMINATOR + bytes(16)), (False, bytes(3) + SELL_DISCRIMINATOR)])
+    assert instruction_kinds(raw, PUMP_KINDS) == 0
+    # Pump absent des clés
+    raw = bytes(VersionedTransaction.populate(
+        Message.new_with_compiled_instructions(1, 0, 1, [key(), key()], Hash.default(),
+                                               [CompiledInstruction(1, BUY_DISCRIMINATOR, bytes([0]))]),
+        [Signature.from_bytes(os.urandom(64))],
+    ))
+    assert instruction_kinds(raw, PUMP_KINDS) == 0
+
+
+def test_v0_message_with_lookup_tables():
+    raw = transaction([(True, SELL_DISCRIMINATOR + bytes(16))], v0=True, lookups=2)
+    assert instruction_kinds(raw, PUMP_KINDS) == KIND_SELL == kinds_from_solders(raw)
+
+
+def test_more_than_127_keys():
+    # compact-u16 sur deux octets pour le nombre de clés, programme à l'index 200
+    raw = transaction([(True, BUY_DISCRIMINATOR + bytes(16))], num_keys=220, pump_index=200, v0=True)
+    assert instruction_kinds(raw, PUMP_KINDS) == KIND_BUY == kinds_from_solders(raw)
+
+
+def test_matches_solders_on_random_transactions():
+    rng = random.Random(7)
+    for _ in range(200):
+        instructions = []
+        for _ in range(rng.randint(1, 4)):
+            data = os.urandom(rng.randint(0, 40))
+            if rng.random() < 0.6:
+                data = rng.choice(DISCRIMINATORS) + data
+            instructions.append((rng.random() < 0.5, data))
+        raw = transaction(instructions, num_keys=rng.choice((3, 20, 130)), v0=rng.random() < 0.5,
+                          lookups=rng.randint(0, 2))
+        assert instruction_kinds(raw, PUMP_KINDS) == kinds_from_solders(raw)
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from pipeline import clock
+from pipeline.replay import BlockRecorder, read_frames, replay_blocks
+
+
+def block_frame(slot, transactions):
+    block = {
+        "transactions": [
+            {"transaction": [raw, "base64"], "meta": {"err": err, "logMessages": [f"log {raw}"]}}
+            for raw, err in transactions
+        ]
+    }
+    return json.dumps({"params": {"result": {"context": {"slot": slot}, "value": {"slot": slot, "block": block}}}})
+
+
+class RecordingDispatcher:
+    watch_creations = False
+
+    def __init__(self):
+        self.monitor_queues = {}
+        self.seen = []  # (raw tx, logs, virtual time)
+
+    async def dispatch_transaction(self, raw_tx, log_messages=None, *args):
+        self.seen.append((raw_tx, log_messages, clock.now()))
+
+
+def test_recorded_frames_replay_in_order_at_their_virtual_time(tmp_path):
+    recorder = BlockRecorder(str(tmp_path), segment_bytes=200)  # une rotation de segment au passage
+    recorder.write(block_frame(1, [("tx-a", None), ("tx-failed", {"InstructionError": []})]), recv_ts=1000.0)
+    recorder.write('{"jsonrpc": "2.0", "result": 5, "id": 1}', recv_ts=1000.2)  # pas une blockNotification
+    recorder.write(block_frame(2, [("tx-b", None), ("tx-c", None)]).encode(), recv_ts=1001.3)
+    recorder.close()
+
+    assert [ts for ts, _ in read_frames(str(tmp_path))] == [1000.0, 1000.2, 1001.3]
+
+    dispatcher = RecordingDispatcher()
+    ticks = []
+    frames, transactions, _ = asyncio.run(
+        replay_blocks(dispatcher, str(tmp_path), tick=0.5, on_tick=lambda now: ticks.append((now, clock.now())))
+    )
+
+    assert (frames, transactions) == (3, 3)
+    assert dispatcher.seen == [
+        ("tx-a", ["log tx-a"], 1000.0),
+        ("tx-b", ["log tx-b"], 1001.3),
+        ("tx-c", ["log tx-c"], 1001.3),
+    ]
+    assert ticks == [(1000.5, 1000.5), (1001.0, 1001.0)]
+    assert dispatcher.cursor == 2  # slot du dernier bloc
+    assert clock._clock is None  # horloge murale restaurée
@@ -0,0 +1,84 @@
+from collections import deque
+
+from pipeline.strategy import compile_strategy
+from pipeline.B_projects_monitoring.momentum_screener import MomentumScreener
+from pipeline.B_projects_monitoring.rule_scheduler import MIN_HOLDERS, NO_HOLDERS, RuleScheduler, strategy_rules
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+def state(holders=0):
+    return {"holder_count": holders, "price": None, "price_history": deque()}
+
+
+def register(scheduler, state_map, spec, on_exit, on_match=None, screened=False):
+    strategy = compile_strategy(spec)
+    scheduler.register(MINT, "token", state_map, strategy.thresholds, on_exit, start_time=100,
+                       screened=screened, on_match=on_match, strategy=strategy.name)
+
+
+def test_monitor_stops_when_every_strategy_failed():
+    scheduler = RuleScheduler()
+    state_map = state(holders=20)
+    exits = []
+    register(scheduler, state_map, {"name": "strict", "live": {"min_holders": 50, "holder_check_sec": 10}},
+             lambda: exits.append("stop"))
+    register(scheduler, state_map, {"name": "loose", "live": {"min_holders": 15, "holder_check_sec": 30}},
+             lambda: exits.append("stop"))
+
+    scheduler.run_once(now=120)  # "strict" échoue, "loose" continue
+    assert list(scheduler.tokens[MINT]) == ["loose"] and exits == []
+
+    state_map["holder_count"] = 10
+    scheduler.run_once(now=131)
+    assert MINT not in scheduler.tokens and exits == ["stop"]
+
+
+def test_screener_match_reports_each_strategy_once():
+    screener = MomentumScreener(min_points=3)
+    scheduler = RuleScheduler(screener=screener)
+    state_map = state(holders=1)
+    matches = []
+    for name in ("a", "b"):
+        register(scheduler, state_map, {"name": name, "live": {"momentum": {"min_points": 3}}},
+                 lambda: None, on_match=lambda s, strategy: matches.append(strategy), screened=True)
+
+    screener.add_token(MINT)
+    for i, sec in enumerate(range(100, 103)):
+        screener.set(MINT, "price", sec, 1.0 + i)
+        screener.add(MINT, "buyers", sec, 1)
+        screener.add(MINT, "volume", sec, 1.0)
+    for _ in range(2):
+        scheduler.mark_dirty(MINT)
+        scheduler.run_once(now=102)
+    assert matches == ["a", "b"]
+
+
+def test_price_rule_disabled_by_null_increase():
+    assert strategy_rules(compile_strategy({"live": {"price_min_increase": None}}).thresholds) == (NO_HOLDERS, MIN_HOLDERS)
+    assert len(strategy_rules(compile_strategy({}).thresholds)) == 3
+
+
+def test_reregistration_ignores_deadlines_of_the_previous_one():
+    scheduler = RuleScheduler()
+    exits = []
+    spec = {"live": {"min_holders": 15, "holder_check_sec": 20}}
+    register(scheduler, state(holders=20), spec, lambda: exits.append("first"))
+    scheduler.unregister(MINT)
+
+    strategy = compile_strategy(spec)
+    scheduler.register(MINT, "token", state(holders=5), strategy.thresholds, lambda: exits.append("second"),
+                       start_time=110)
+    scheduler.run_once(now=121)  # deadline de la première inscription (100 + 20) : ignorée
+    assert exits == [] and MINT in scheduler.tokens
+
+    scheduler.run_once(now=130)
+    assert exits == ["second"]
+
+
+def test_start_time_zero_is_kept():
+    scheduler = RuleScheduler()
+    register(scheduler, state(), {}, lambda: None)
+    strategy = compile_strategy({})
+    scheduler.register(MINT, "token", state(), strategy.thresholds, lambda: None, start_time=0)
+    assert min(deadline for deadline, *_ in scheduler.deadlines) == 10
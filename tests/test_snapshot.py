@@ -0,0 +1,101 @@
+import asyncio
+import os
+
+import numpy as np
+from solders.pubkey import Pubkey
+
+from pipeline import clock, metrics, snapshot
+from pipeline.block_decoder import BUY_DISCRIMINATOR, SELL_DISCRIMINATOR, TradeRecord
+from pipeline.dispatcher import ProjectDispatcher
+from pipeline.replay import drain
+from pipeline.B_projects_monitoring import rule_scheduler
+from pipeline.B_projects_monitoring.momentum_screener import MomentumScreener
+from pipeline.B_projects_monitoring.monirot_v2 import monitor_project
+from pipeline.B_projects_monitoring.rule_scheduler import RuleScheduler
+
+
+def test_snapshot_dump_reported_as_event_loop_lag(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "snapshot.pkl")
+        observed = metrics.EVENT_LOOP_LAG.count
+        task = asyncio.create_task(snapshot.snapshot_loop(ProjectDispatcher(), path, interval=0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        assert metrics.EVENT_LOOP_LAG.count > observed
+        assert (tmp_path / "snapshot.pkl").exists()
+
+    asyncio.run(scenario())
+
+
+def test_monitors_resume_with_the_same_state(tmp_path, monkeypatch):
+    scheduler = RuleScheduler(screener=MomentumScreener())
+    scheduler.manual = True  # pas de tick : seul l'état des monitors compte ici
+    monkeypatch.setattr(rule_scheduler, "_scheduler", scheduler)
+    monkeypatch.setattr(snapshot, "_live", {})
+    virtual = clock.VirtualClock(1000.0)
+    clock.use_clock(virtual)
+    path = str(tmp_path / "snapshot.pkl")
+    projects = [
+        {"mint": str(Pubkey.from_bytes(os.urandom(32))), "name": f"token-{i}", "bondingCurve": "curve"}
+        for i in range(2)
+    ]
+    actors = [os.urandom(32) for _ in range(3)]
+
+    async def start(dispatcher):
+        tasks = [asyncio.create_task(monitor_project(dispatcher.project_definitions[p["mint"]], dispatcher))
+                 for p in projects]
+        await asyncio.sleep(0)
+        return tasks
+
+    async def scenario():
+        dispatcher = ProjectDispatcher()
+        for project in projects:
+            await dispatcher.register_project(project)
+        tasks = await start(dispatcher)
+        for i in range(12):
+            virtual.set(1000.0 + i * 0.7)
+            mint = projects[i % 2]["mint"]
+            side = SELL_DISCRIMINATOR if i % 5 == 4 else BUY_DISCRIMINATOR
+            record = TradeRecord(os.urandom(64), b"", side, (i + 1) * 10**6, (i + 1) * 10**7, actors[i % 3])
+            dispatcher.monitor_queues[mint].put_nowait(record)
+            dispatcher.monitor_queues[mint].put_nowait(("price_update", 1e-8 * (i + 1)))
+            await drain(dispatcher)
+        dispatcher.cursor = 4242
+
+        before = {mint: (state_map, start_time) for mint, (state_map, start_time) in snapshot._live.items()}
+        snapshot.write_file(path, snapshot.take_snapshot(dispatcher))
+        for project in projects:
+            dispatcher.monitor_queues[project["mint"]].put_nowait(None)
+        await asyncio.gather(*tasks)
+        assert not snapshot._live
+
+        restarted = ProjectDispatcher()
+        cursor = await snapshot.restore(restarted, path)
+        tasks = await start(restarted)
+        after = dict(snapshot._live)
+        for task in tasks:
+            task.cancel()
+        return before, after, cursor, restarted.cursor
+
+    try:
+        before, after, cursor, restored_cursor = asyncio.run(scenario())
+    finally:
+        clock.use_clock(None)
+
+    assert cursor == restored_cursor == 4242
+    assert before.keys() == after.keys() == {p["mint"] for p in projects}
+    for mint, (state_map, start_time) in before.items():
+        restored, restored_start = after[mint]
+        assert restored_start == start_time == 1000.0
+        assert restored["tx_count"] == state_map["tx_count"] > 0
+        assert restored["holder_count"] == state_map["holder_count"] > 0
+        assert restored["balances"] == state_map["balances"]
+        assert restored["balances"] is restored["stats"].positions
+        assert restored["price"] == state_map["price"]
+        series, restored_series = state_map["series"], restored["series"]
+        assert restored_series.last_sec == series.last_sec
+        assert np.array_equal(restored_series.first_sec, series.first_sec)
+        assert np.array_equal(restored_series.values, series.values)
+        trades, restored_trades = state_map["trades"], restored["trades"]
+        assert len(restored_trades) == len(trades) > 0
+        assert np.array_equal(restored_trades.ts[:len(trades)], trades.ts[:len(trades)])
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from pipeline.strategy import (
+    DEFAULT_LIVE,
+    DEFAULT_MOMENTUM,
+    StrategySet,
+    compile_filters,
+    compile_strategy,
+    load_strategies,
+)
+
+
+def token(name="Pepe Coin", symbol="PEPE", user="creator"):
+    return {"name": name, "symbol": symbol, "user": user}
+
+
+def test_live_thresholds_merged_with_defaults():
+    strategy = compile_strategy({"name": "s", "live": {"min_holders": 30, "momentum": {"min_points": 3}}})
+    assert strategy.thresholds == {**DEFAULT_LIVE, "min_holders": 30, "momentum": {**DEFAULT_MOMENTUM, "min_points": 3}}
+    assert compile_strategy({}).thresholds["momentum"] == DEFAULT_MOMENTUM
+    assert compile_strategy({"live": {"momentum": None}}).thresholds["momentum"] is None
+    assert compile_strategy({"live": {"momentum": False}}).thresholds["momentum"] is None
+
+
+@pytest.mark.parametrize("spec, message", [
+    ({"create": {"name_regexp": "pepe"}}, "Unknown create filter: name_regexp"),
+    ({"live": {"min_holder": 10}}, "Unknown live rule"),
+    ({"live": {"momentum": {"min_point": 3}}}, "Unknown momentum setting"),
+    ({"live": {"momentum": {"min_points": 3, "window": 5, "max_age": 7}}}, "max_age, window"),
+    ({"live": {"momentum": 5}}, "momentum must be an object or null"),
+    ({"live": {"momentum": True}}, "momentum must be an object or null"),
+])
+def test_invalid_specs_rejected(spec, message):
+    with pytest.raises(ValueError, match=message):
+        compile_strategy(spec)
+
+
+def test_create_filters():
+    strategy = compile_strategy({"create": {
+        "name_regex": "pepe|frog", "creator_deny": ["scammer"], "symbol_len": [3, 5],
+    }})
+    assert strategy.accepts(token())
+    assert strategy.accepts(token(name="Frogz", symbol="FRG"))
+    assert not strategy.accepts(token(name="Doge", symbol="DOGE"))
+    assert not strategy.accepts(token(user="scammer"))
+    assert not strategy.accepts(token(symbol="PEPEPEPE"))
+
+    allow = compile_strategy({"create": {"creator_allow": ["a"], "creator_address": "b"}})
+    assert allow.accepts(token(user="a")) and allow.accepts(token(user="b"))
+    assert not allow.accepts(token(user="c"))
+
+
+def test_strategy_set_match_and_for_project():
+    strategies = compile_filters([
+        {"name": "pepe", "create": {"name_contains": "pepe"}},
+        {"name": "all"},
+    ])
+    assert [s.name for s in strategies.match(token())] == ["pepe", "all"]
+    assert [s.name for s in strategies.match(token(name="Doge", symbol="DOGE"))] == ["all"]
+    assert [s.name for s in strategies.for_project({"strategies": ["all", "gone"]})] == ["all"]
+    assert strategies.for_project({}) == []
+
+    with pytest.raises(ValueError, match="unique"):
+        StrategySet([compile_strategy({"name": "x"}), compile_strategy({"name": "x"})])
+
+
+def test_old_filters_dict_and_loaded_file(tmp_path):
+    old = compile_filters({"name_contains": "pepe"})
+    assert len(old) == 1 and old.match(token()) and not old.match(token(name="Doge", symbol="DOGE"))
+    assert compile_filters(old) is old
+
+    path = tmp_path / "strategies.json"
+    path.write_text(json.dumps({"strategies": [{"name": "a", "live": {"momentum": None}}, {"name": "b"}]}))
+    loaded = load_strategies(str(path))
+    assert loaded.get("a").thresholds["momentum"] is None
+    assert loaded.get("b").thresholds["momentum"] == DEFAULT_MOMENTUM
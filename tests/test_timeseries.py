@@ -0,0 +1,18 @@
+from pipeline.B_projects_monitoring.timeseries import TRADE_METRICS, PerSecondSeries
+
+
+def test_history_is_counted_per_metric():
+    series = PerSecondSeries(TRADE_METRICS)
+    series.set("price", 100, 1.0)  # mise à jour de prix seule à t0
+    series.add("buyers", 104, 1)  # premier achat à t4
+
+    assert series.available("price", 104) == 5
+    assert series.available("buyers", 104) == 1
+    assert series.available("volume", 104) == 0
+    assert list(series.last("buyers", 5)) == [0, 0, 0, 0, 1]
+
+
+def test_available_is_capped_by_capacity():
+    series = PerSecondSeries(TRADE_METRICS, capacity=8)
+    series.add("volume", 10, 0.5)
+    assert series.available("volume", 100) == 8
@@ -0,0 +1,60 @@
+import pytest
+
+from pipeline.B_projects_monitoring.trade_log import BUY, SELL, TokenTradeLog
+
+
+def filled(trades, **kwargs):
+    log = TokenTradeLog(capacity=4, **kwargs)
+    for ts, sol, tokens, side, actor in trades:
+        log.append(ts, sol, tokens, side, actor)
+    return log
+
+
+TRADES = [
+    (10.0, 1.0, 100.0, BUY, "a"),
+    (10.0, 2.0, 100.0, BUY, "b"),  # même seconde, même ts
+    (11.5, 1.0, 50.0, SELL, "a"),
+    (12.0, 3.0, 100.0, BUY, "c"),
+    (13.0, 4.0, 100.0, BUY, "a"),
+]
+
+
+def test_window_includes_since_and_excludes_until():
+    log = filled(TRADES)
+    assert len(log) == 5  # colonnes doublées au passage
+    assert log.window() == slice(0, 5)
+    assert log.window(10.0, 12.0) == slice(0, 3)  # les deux trades à 10.0, pas celui à 12.0
+    assert log.window(10.0 + 1e-9, 12.0 + 1e-9) == slice(2, 4)
+    assert log.window(12.0, 12.0) == slice(3, 3)  # fenêtre vide
+    assert log.window(since=13.0) == slice(4, 5)
+    assert log.window(until=10.0) == slice(0, 0)
+    assert log.window(20.0) == slice(5, 5)
+
+
+def test_vwap_by_side_and_window():
+    log = filled(TRADES)
+    assert log.vwap() == pytest.approx(10.0 / 400.0)
+    assert log.vwap(side=SELL) == pytest.approx(1.0 / 50.0)
+    assert log.vwap(side=None) == pytest.approx(11.0 / 450.0)
+    assert log.vwap(12.0, 13.0) == pytest.approx(3.0 / 100.0)  # until exclu
+    assert log.vwap(11.0, 12.0) is None  # pas d'achat dans la fenêtre
+
+
+def test_rows_older_than_max_age_are_compacted():
+    log = TokenTradeLog(capacity=4, max_age=5)
+    for i in range(40):
+        log.append(float(i), 1.0 + i, 10.0, BUY if i % 4 else SELL, i % 3)
+        assert len(log.ts) <= 16
+    assert len(log) < 16  # seulement les dernières secondes
+    assert list(log.ts[:len(log)]) == [float(i) for i in range(40 - len(log), 40)]
+
+    buys = [i for i in range(40) if i % 4]
+    assert log.vwap() == pytest.approx(sum(1.0 + i for i in buys) / (10.0 * len(buys)))  # totaux gardés
+    assert log.vwap(since=35.0) == pytest.approx(sum(1.0 + i for i in (35, 37, 38, 39)) / 40.0)
+
+
+def test_no_compaction_without_max_age():
+    log = TokenTradeLog(capacity=4, max_age=None)
+    for i in range(40):
+        log.append(float(i), 1.0, 1.0, BUY, "a")
+    assert len(log) == 40 and log.ts[0] == 0.0
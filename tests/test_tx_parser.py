@@ -0,0 +1,109 @@
+import os
+
+import pytest
+from solders.hash import Hash
+from solders.instruction import CompiledInstruction
+from solders.message import Message, MessageAddressTableLookup, MessageHeader, MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+from config import PUMP_PROGRAM
+from pipeline.tx_parser import parse_pump_transaction, read_compact_u16
+
+
+def key():
+    return Pubkey.from_bytes(os.urandom(32))
+
+
+def transaction(instructions, num_keys=6, pump_index=None, v0=False, lookups=0, signatures=1):
+    """instructions: [(program is Pump, data, account indexes)]."""
+    keys = [key() for _ in range(num_keys)]
+    other = key()
+    keys.append(other)
+    keys.insert(len(keys) if pump_index is None else pump_index, PUMP_PROGRAM)
+    ixs = [
+        CompiledInstruction(keys.index(PUMP_PROGRAM if is_pump else other), data, bytes(accounts))
+        for is_pump, data, accounts in instructions
+    ]
+    if v0:
+        tables = [MessageAddressTableLookup(key(), bytes([0, 1]), bytes([2])) for _ in range(lookups)]
+        message = MessageV0(MessageHeader(signatures, 0, 2), keys, Hash.default(), ixs, tables)
+    else:
+        message = Message.new_with_compiled_instructions(signatures, 0, 2, keys, Hash.default(), ixs)
+    sigs = [Signature.from_bytes(os.urandom(64)) for _ in range(signatures)]
+    return bytes(VersionedTransaction.populate(message, sigs))
+
+
+def assert_matches_solders(raw):
+    parsed = parse_pump_transaction(raw)
+    tx = VersionedTransaction.from_bytes(raw)
+    message = tx.message
+    keys = message.account_keys
+    pump_ixs = [ix for ix in message.instructions if keys[ix.program_id_index] == PUMP_PROGRAM]
+
+    assert parsed.signature == bytes(tx.signatures[0])
+    assert parsed.version == (0 if isinstance(message, MessageV0) else None)
+    assert parsed.num_keys == len(keys)
+    assert [parsed.pubkey(i) for i in range(parsed.num_keys)] == list(keys)
+    assert [bytes(ix.data) for ix in parsed.instructions] == [bytes(ix.data) for ix in pump_ixs]
+    assert [bytes(ix.accounts) for ix in parsed.instructions] == [bytes(ix.accounts) for ix in pump_ixs]
+    assert parsed.to_versioned() == tx
+    return parsed
+
+
+@pytest.mark.parametrize("value, encoded", [
+    (0, b"\x00"), (127, b"\x7f"), (128, b"\x80\x01"), (300, b"\xac\x02"),
+    (16383, b"\xff\x7f"), (16384, b"\x80\x80\x01"), (65535, b"\xff\xff\x03"),
+])
+def test_read_compact_u16(value, encoded):
+    assert read_compact_u16(b"\x09" + encoded + b"\x09", 1) == (value, 1 + len(encoded))
+
+
+def test_read_compact_u16_rejects_a_fourth_byte():
+    with pytest.raises(ValueError):
+        read_compact_u16(b"\x80\x80\x80\x01", 0)
+
+
+def test_legacy_transaction_keeps_only_pump_instructions():
+    raw = transaction([
+        (False, os.urandom(12), [0, 1]),
+        (True, os.urandom(24), [0, 2, 3]),
+        (True, os.urandom(8), [4]),
+    ], signatures=2)
+    parsed = assert_matches_solders(raw)
+    assert len(parsed.instructions) == 2
+    ix = parsed.instructions[0]
+    assert parsed.account(ix, 1) == parsed.key(2)
+    assert parsed.account(ix, 3) is None  # au-delà des comptes de l'instruction
+
+
+def test_v0_transaction_with_lookup_tables():
+    raw = transaction([(True, os.urandom(24), [0, 1, 2])], v0=True, lookups=2)
+    parsed = assert_matches_solders(raw)
+    assert parsed.version == 0
+
+
+def test_more_than_127_keys():
+    # compact-u16 sur deux octets pour le nombre de clés, programme à l'index 200
+    raw = transaction([(True, os.urandom(30), [0, 150, 210])], num_keys=220, pump_index=200, v0=True)
+    parsed = assert_matches_solders(raw)
+    assert parsed.instructions[0].program_id_index == 200
+    assert parsed.account(parsed.instructions[0], 2) == parsed.key(210)
+
+
+def test_no_pump_instruction():
+    assert parse_pump_transaction(transaction([(False, os.urandom(8), [0])])) is None
+    # Pump absent des clés
+    raw = bytes(VersionedTransaction.populate(
+        Message.new_with_compiled_instructions(1, 0, 1, [key(), key()], Hash.default(),
+                                               [CompiledInstruction(1, os.urandom(8), bytes([0]))]),
+        [Signature.from_bytes(os.urandom(64))],
+    ))
+    assert parse_pump_transaction(raw) is None
+
+
+def test_truncated_transaction():
+    raw = transaction([(True, os.urandom(24), [0, 1])])
+    with pytest.raises(ValueError):
+        parse_pump_transaction(raw[:-10])